@@ -16,21 +16,39 @@ from luaparser.astnodes import (
     Call, Invoke,
     Index, Name, String, Number, Nil, TrueExpr, FalseExpr,
     Table, Field,
-    Concat, AddOp, SubOp, MultOp, FloatDivOp, ModOp, ExpoOp,
+    Concat, AddOp, SubOp, MultOp, FloatDivOp, FloorDivOp, ModOp, ExpoOp,
+    BAndOp, BOrOp, BXorOp, BShiftLOp, BShiftROp, BinaryOp, UnaryOp,
     Return, Break,
     UMinusOp, UBNotOp, ULNotOp, ULengthOP,
     AndLoOp, OrLoOp,
     LessThanOp, GreaterThanOp, LessOrEqThanOp, GreaterOrEqThanOp, EqToOp, NotEqToOp,
-    SemiColon, Comment,
+    SemiColon, Comment, Varargs, Goto, Label,
+    Do, Dots, AnonymousFunction,
 )
-from typing import List, Dict, Set, Optional, Tuple, Any
-from dataclasses import dataclass, field
+from typing import List, Dict, Set, Optional, Tuple, Any, Callable, Iterable, Iterator
+from dataclasses import dataclass, field, replace
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from collections import defaultdict
+from bisect import bisect_left
+from array import array
 import sys
-import io
+import os
+import re
+import hashlib
+import pickle
+import tempfile
 
-from models import Finding
+from models import Finding, _DATACLASS_SLOTS
+
+
+# bump whenever analysis output changes, so on-disk cached findings from an
+# older version are not reused
+ANALYZER_CACHE_VERSION = '10'
+
+# ANTLR lexer errors are printed to stderr and luaparser has no option to
+# silence them, send them here instead of buffering them per file
+_DEVNULL = open(os.devnull, 'w')
 
 
 # Hot callbacks/functions that run frequently in FiveM
@@ -99,6 +117,11 @@ CACHEABLE_MODULE_FUNCS = {
     }),
 }
 
+# flat "module.func" view of the above for single-lookup checks
+CACHEABLE_MODULE_FULLNAMES = frozenset(
+    f"{module}.{func}" for module, funcs in CACHEABLE_MODULE_FUNCS.items() for func in funcs
+)
+
 # Debug/logging function patterns
 DEBUG_FUNCTIONS = frozenset({
     'print', 'printf', 'printe', 'printd', 'log',
@@ -111,6 +134,114 @@ DIRECT_REPLACEMENT_FUNCS = frozenset({
     'table.insert', 'table.getn', 'string.len',
 })
 
+# Name classification flags. NAME_KIND merges the sets above so call sites that
+# need several answers about one name pay a single dict lookup.
+# The frozensets stay the source of truth, NAME_KIND is derived from them.
+NAME_HOT = 1                # HOT_CALLBACKS
+NAME_CACHEABLE = 2          # CACHEABLE_BARE_GLOBALS / CACHEABLE_MODULE_FULLNAMES
+NAME_DEBUG = 4              # DEBUG_FUNCTIONS
+NAME_UNSAFE_TO_CACHE = 8    # BARE_GLOBALS_UNSAFE_TO_CACHE
+NAME_DIRECT_REPLACEMENT = 16  # DIRECT_REPLACEMENT_FUNCS
+
+NAME_KIND: Dict[str, int] = {}
+for _names, _flag in (
+    (HOT_CALLBACKS, NAME_HOT),
+    (CACHEABLE_BARE_GLOBALS, NAME_CACHEABLE),
+    (CACHEABLE_MODULE_FULLNAMES, NAME_CACHEABLE),
+    (DEBUG_FUNCTIONS, NAME_DEBUG),
+    (BARE_GLOBALS_UNSAFE_TO_CACHE, NAME_UNSAFE_TO_CACHE),
+    (DIRECT_REPLACEMENT_FUNCS, NAME_DIRECT_REPLACEMENT),
+):
+    for _name in _names:
+        NAME_KIND[_name] = NAME_KIND.get(_name, 0) | _flag
+del _names, _flag, _name
+
+# Expensive FiveM native calls to track
+# These should be cached rather than called repeatedly in tick loops
+# NOTE: GetGameTimer() is NOT included because it returns different values
+# each call (current time) - caching it breaks elapsed time calculations
+EXPENSIVE_CALLS = frozenset({
+    'PlayerPedId',              # Get player ped - cache once per tick
+    'PlayerId',                 # Get player ID - cache once
+    'GetPlayerServerId',        # Get server ID - cache once
+    'GetEntityCoords',          # Cache coordinates if used multiple times
+    'GetEntityModel',           # Model hash doesn't change - cache it
+    'GetHashKey',               # Hash computation - cache results
+    'GetPlayerPed',             # Get ped from player ID - cache it
+    'GetVehiclePedIsIn',        # Cache vehicle reference
+    'GetEntityHeading',         # Cache heading if used multiple times
+    'GetDistanceBetweenCoords', # Should use vector math #(v1-v2) instead
+    # Entity properties
+    'GetEntityVelocity',        # Velocity vector - cache for multiple reads in same tick
+    'GetEntityRotation',        # Rotation vector - cache if used multiple times
+    'GetEntityHealth',          # Health value - cache for multiple reads
+    'GetEntityMaxHealth',       # Max health - rarely changes, cache it
+    'GetEntitySpeed',           # Speed scalar - cache for multiple reads in same tick
+    'GetEntityForwardVector',   # Forward direction vector - cache it
+    # Vehicle natives
+    'GetVehicleClass',          # Vehicle classification - static per vehicle
+    'GetVehicleEngineHealth',   # Engine health - cache for multiple reads
+    'GetVehicleBodyHealth',     # Body health - cache for multiple reads
+    'GetVehicleNumberPlateText', # Plate text - static per vehicle
+    'GetVehiclePedIsUsing',     # Similar to GetVehiclePedIsIn - cache it
+    # Ped/Player natives
+    'GetSelectedPedWeapon',     # Current weapon hash - cache for multiple reads
+    'GetPedArmour',             # Armor value - cache for multiple reads
+    'IsPedInAnyVehicle',        # Boolean vehicle check - cache for multiple reads
+    'GetPlayerWantedLevel',     # Wanted level - cache for multiple reads
+    'GetPedMaxHealth',          # Max health - rarely changes, cache it
+    # ox_lib functions (expensive lookups)
+    'lib.getClosestPlayer',     # Distance calculations - cache result
+    'lib.getClosestPed',        # Distance calculations - cache result
+    'lib.getClosestVehicle',    # Distance calculations - cache result
+    'lib.getClosestObject',     # Distance calculations - cache result
+    'lib.getNearbyPlayers',     # Entity iteration - cache result
+    'lib.getNearbyPeds',        # Entity iteration - cache result
+    'lib.getNearbyVehicles',    # Entity iteration - cache result
+    'lib.getNearbyObjects',     # Entity iteration - cache result
+    'lib.getCoreObject',        # Framework bridge - cache reference
+    'lib.getPlayer',            # Player data lookup - cache result
+    'lib.progressActive',       # UI state check - cache in tight loops
+})
+
+# suggested caching line for repeated expensive calls, anything not listed
+# gets a generic "Cache <name> result"
+REPEATED_CALL_SUGGESTIONS = {
+    'PlayerPedId': 'local ped = PlayerPedId()',
+    'PlayerId': 'local playerId = PlayerId()',
+    'GetPlayerServerId': 'local serverId = GetPlayerServerId(PlayerId())',
+    'GetEntityCoords': 'local coords = GetEntityCoords(ped)',
+    'GetEntityModel': 'local model = GetEntityModel(entity)',
+    'GetHashKey': 'local hash = GetHashKey(str) -- or use `hash` literal',
+    'GetPlayerPed': 'local ped = GetPlayerPed(playerId)',
+    'GetVehiclePedIsIn': 'local vehicle = GetVehiclePedIsIn(ped, false)',
+    'GetEntityHeading': 'local heading = GetEntityHeading(entity)',
+    'GetDistanceBetweenCoords': 'Use #(coords1 - coords2) for faster distance calculation',
+}
+
+# (pattern_name, suggestion, severity) of the repeated-call finding for each
+# expensive call, built once here instead of per finding
+REPEATED_CALL_FINDINGS: Dict[str, Tuple[str, str, str]] = {
+    name: (
+        f'repeated_{name.replace(".", "_").replace(":", "_")}',
+        REPEATED_CALL_SUGGESTIONS.get(name, f'Cache {name} result'),
+        # vector math instead of the native is the more impactful optimization
+        'YELLOW' if name == 'GetDistanceBetweenCoords' else 'GREEN',
+    )
+    for name in EXPENSIVE_CALLS
+}
+
+# deprecated calls share one pass and are bucketed together by _record_call
+# so their findings stay in call order. single-name passes read calls_by_name
+DEPRECATED_FUNCS = frozenset({'table.getn', 'string.len'})
+
+# accepted spellings of the player ped / player id argument of the natives
+# below. each is a Name, an Index or a Call, other arguments are rejected
+# by type before they are formatted
+_OXLIB_PED_ARGS = frozenset({'PlayerPedId()', 'cache.ped', 'ped'})
+_OXLIB_PLAYER_ARGS = frozenset({'PlayerId()', 'cache.playerId'})
+_OXLIB_ARG_TYPES = frozenset((Name, Index, Call))
+
 # ox_lib cache replacements - native calls that can use ox_lib's cache system
 # Format: native_call -> (cache_property, description, args_pattern)
 # args_pattern: None = no args, 'ped' = PlayerPedId()/cache.ped arg, 'player' = PlayerId() arg
@@ -157,9 +288,35 @@ NIL_RETURNING_FUNCTIONS = {
     'GetVehiclePedIsUsing': 'ped not using vehicle (returns 0)',
 }
 
+# membership view of the above, the dict is only needed for the descriptions
+NIL_RETURNING_FUNCS = frozenset(NIL_RETURNING_FUNCTIONS)
+# bare method names of the ':method' entries above
+NIL_RETURNING_METHODS = frozenset(name[1:] for name in NIL_RETURNING_FUNCTIONS if name.startswith(':'))
+
+# nil guard patterns checked between a nil-returning assignment and its use,
+# matched as plain substrings of the source line
+NIL_GUARD_TEMPLATES = (
+    'if {var} then',
+    'if {var} and',
+    'if not {var} then',
+    'if {var} ~= nil',
+    'if {var} == nil then return',
+    '{var} and {var}:',
+    '{var} and {var}.',
+)
+
+# statement starts a nil-check wrap can't be placed around
+CONTROL_FLOW_PREFIXES = ('if ', 'if(', 'for ', 'while ', 'repeat', 'function ', 'function(')
+
+# per-line flags computed by ASTAnalyzer._scan_lines
+LINE_LOCAL = 1          # stripped line starts with 'local '
+LINE_CONTROL_FLOW = 2   # stripped line starts with one of CONTROL_FLOW_PREFIXES
+LINE_HAS_IF = 4         # 'if ' somewhere in the line
+LINE_HAS_AND = 8        # ' and ' somewhere in the line
+
 # Method patterns that indicate the variable is being nil-checked
 # These patterns mean the variable is safe to use after the check
-NIL_CHECK_PATTERNS = {
+NIL_CHECK_PATTERNS = frozenset({
     'if {var} then',
     'if {var} and',
     'if not {var} then return',
@@ -169,33 +326,167 @@ NIL_CHECK_PATTERNS = {
     'if {var} ~= nil then',
     '{var} and {var}:',
     '{var} and {var}.',
-}
+})
 
 # Callback parameters that are guaranteed non-nil by FiveM
 # Format: event_name -> set of safe param indices (0-indexed)
 SAFE_CALLBACK_PARAMS = {
     # FiveM Server Events
-    'playerConnecting': {0, 1, 2},      # name, setKickReason, deferrals
-    'playerDropped': {0},                # reason
-    'onResourceStart': {0},              # resourceName
-    'onResourceStop': {0},               # resourceName
-    'onResourceStarting': {0},           # resourceName
+    'playerConnecting': frozenset({0, 1, 2}),            # name, setKickReason, deferrals
+    'playerDropped': frozenset({0}),                     # reason
+    'onResourceStart': frozenset({0}),                   # resourceName
+    'onResourceStop': frozenset({0}),                    # resourceName
+    'onResourceStarting': frozenset({0}),                # resourceName
 
     # FiveM Client Events
-    'onClientResourceStart': {0},        # resourceName
-    'onClientResourceStop': {0},         # resourceName
-    'gameEventTriggered': {0, 1},        # eventName, eventArgs
+    'onClientResourceStart': frozenset({0}),             # resourceName
+    'onClientResourceStop': frozenset({0}),              # resourceName
+    'gameEventTriggered': frozenset({0, 1}),             # eventName, eventArgs
 
     # BaseEvents (common FiveM resource)
-    'baseevents:onPlayerDied': {0, 1},           # killerType, deathCoords
-    'baseevents:onPlayerKilled': {0, 1, 2},      # killerId, deathCoords, killerType
-    'baseevents:enteredVehicle': {0, 1, 2},      # vehicle, seat, displayName
-    'baseevents:enteringVehicle': {0, 1, 2},     # vehicle, seat, displayName
-    'baseevents:leftVehicle': {0, 1, 2},         # vehicle, seat, displayName
+    'baseevents:onPlayerDied': frozenset({0, 1}),        # killerType, deathCoords
+    'baseevents:onPlayerKilled': frozenset({0, 1, 2}),   # killerId, deathCoords, killerType
+    'baseevents:enteredVehicle': frozenset({0, 1, 2}),   # vehicle, seat, displayName
+    'baseevents:enteringVehicle': frozenset({0, 1, 2}),  # vehicle, seat, displayName
+    'baseevents:leftVehicle': frozenset({0, 1, 2}),      # vehicle, seat, displayName
+}
+
+
+# leaf nodes (and None) have nothing to visit, they map to None in _HANDLERS.
+# int is the default Fornum step, which luaparser leaves as a plain 1
+_TERMINAL_TYPES = frozenset((
+    type(None), int, Name, Number, String, Nil, TrueExpr, FalseExpr,
+    SemiColon, Comment, Break, Varargs, Dots, Goto, Label,
+))
+
+# value_type recorded by _record_assignment, keyed by the exact node type
+# (none of these have subclasses). anything else is 'other'
+_ASSIGN_VALUE_TYPES: Dict[type, str] = {
+    Call: 'call',
+    Index: 'index',
+    Concat: 'concat',
+    Number: 'literal', String: 'literal', TrueExpr: 'literal', FalseExpr: 'literal', Nil: 'literal',
+}
+
+# leaf types tested by exact type in the dead code passes (no subclasses)
+_DEAD_SKIP_TYPES = frozenset((Comment, SemiColon))
+_FALSE_LITERAL_TYPES = frozenset((FalseExpr, Nil))
+
+
+# child attributes in the order luaparser's ast.walk visits them. _walk_nodes
+# reproduces ast.walk without its per-node multi-dispatch, subclasses (Concat,
+# LocalAssign, ...) resolve through their bases on first sight
+_WALK_ATTRS: Dict[type, Tuple[str, ...]] = {
+    Chunk: ('body',), Block: ('body',), Do: ('body',),
+    Assign: ('targets', 'values'),
+    While: ('test', 'body'), Repeat: ('body', 'test'),
+    If: ('test', 'body', 'orelse'), ElseIf: ('test', 'body', 'orelse'),
+    Fornum: ('target', 'start', 'stop', 'step', 'body'),
+    Forin: ('targets', 'iter', 'body'),
+    Return: ('values',),
+    Call: ('func', 'args'), Invoke: ('source', 'func', 'args'),
+    Function: ('name', 'args', 'body'), LocalFunction: ('name', 'args', 'body'),
+    Method: ('source', 'name', 'args', 'body'),
+    AnonymousFunction: ('args', 'body'),
+    Table: ('fields',), Field: ('key', 'value'),
+    Index: ('value', 'idx'),
+    BinaryOp: ('left', 'right'), UnaryOp: ('operand',),
+    Label: (), Goto: (), Break: (), SemiColon: (), Comment: (),
+    Name: (), Number: (), String: (), Nil: (), TrueExpr: (), FalseExpr: (),
+    Dots: (), Varargs: (),
+}
+
+
+def _walk_attrs(node_type: type) -> Tuple[str, ...]:
+    for base in node_type.__mro__:
+        attrs = _WALK_ATTRS.get(base)
+        if attrs is not None:
+            _WALK_ATTRS[node_type] = attrs
+            return attrs
+    _WALK_ATTRS[node_type] = ()
+    return ()
+
+
+def _walk_nodes(root: Node) -> List[Node]:
+    """All nodes under root in ast.walk order (pre-order), iteratively."""
+    nodes = []
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Node):
+            nodes.append(item)
+            attrs = _WALK_ATTRS.get(type(item))
+            if attrs is None:
+                attrs = _walk_attrs(type(item))
+            for attr in reversed(attrs):
+                stack.append(getattr(item, attr, None))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+    return nodes
+
+
+_LEADING_SPACE_RE = re.compile(r'\s*')
+_BLOCK_COMMENT_RE = re.compile(r'--\[(=*)\[.*?\]\1\]', re.S)
+
+
+def _has_code(source: str) -> bool:
+    """False if source is only whitespace and comments, which can't produce findings."""
+    pos = 0
+    end = len(source)
+    while True:
+        pos = _LEADING_SPACE_RE.match(source, pos).end()
+        if pos == end:
+            return False
+        if not source.startswith('--', pos):
+            return True
+        block = _BLOCK_COMMENT_RE.match(source, pos)
+        if block:
+            pos = block.end()
+        else:
+            pos = source.find('\n', pos)
+            if pos == -1:
+                return False
+
+
+def _copy_findings(findings: List[Finding]) -> List[Finding]:
+    """Copies of findings going in or out of the memo, so callers can't edit the stored ones."""
+    return [replace(f, details=dict(f.details)) for f in findings]
+
+
+# statement types _walk_for_dead_after_terminator descends into, and how
+_NESTED_BODY_KIND: Dict[type, str] = {
+    Function: 'function', LocalFunction: 'function', Method: 'function',
+    If: 'branch', ElseIf: 'branch',
+    While: 'loop', Repeat: 'loop', Fornum: 'loop', Forin: 'loop',
 }
 
 
-@dataclass
+# node type -> names of the attributes that can hold child nodes, so
+# _visit_children doesn't have to walk vars() of every node it visits.
+# seeded with the known luaparser fields (a node's comments only ever hold
+# Comment leaves, so leaving them out visits nothing less). types missing
+# here are filled in by _scan_child_attrs the first time they are seen
+_CHILD_ATTRS: Dict[type, Tuple[str, ...]] = dict(_WALK_ATTRS)
+
+
+def _scan_child_attrs(node: Node) -> Tuple[str, ...]:
+    """Record which attributes of this node's type can hold child nodes."""
+    try:
+        node_dict = vars(node) if hasattr(node, '__dict__') else {}
+    except TypeError:
+        node_dict = {}
+
+    # keep None-valued attributes too, other instances of the same type may
+    # have a node there (e.g. an optional sub-expression)
+    attrs = tuple(
+        key for key, value in node_dict.items()
+        if not key.startswith('_') and (value is None or isinstance(value, (Node, list)))
+    )
+    _CHILD_ATTRS[type(node)] = attrs
+    return attrs
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class Scope:
     """Represents a variable scope (function, loop, block)."""
     name: str
@@ -211,6 +502,39 @@ class Scope:
     # cached globals in this scope
     cached_globals: Set[str] = field(default_factory=set)
 
+    # cached_globals is inherited by reference (see ASTAnalyzer._enter_scope)
+    # and copied before the first write while set
+    shares_cached_globals: bool = field(default=False, repr=False)
+
+    # locals of this scope and every enclosing one. shared with the parent
+    # until this scope declares its first local, see add_local
+    visible_locals: Set[str] = field(default_factory=set, repr=False)
+
+    # innermost loop scope enclosing this one (itself for loops), set on entry
+    loop_scope: Optional['Scope'] = field(default=None, repr=False)
+
+    # innermost enclosing function scope (itself for functions, the global
+    # scope outside any function), set on entry
+    function_scope: Optional['Scope'] = field(default=None, repr=False)
+
+    # nil sources of this scope and every enclosing one, innermost wins
+    visible_nil: Dict[str, 'NilSourceInfo'] = field(default_factory=dict, repr=False)
+
+    def _own_cached_globals(self):
+        self.cached_globals = set(self.cached_globals)
+        self.shares_cached_globals = False
+
+    def add_local(self, name: str):
+        self.locals.add(name)
+        if self.parent is not None and self.visible_locals is self.parent.visible_locals:
+            self.visible_locals = set(self.visible_locals)
+        self.visible_locals.add(name)
+
+    def add_cached_global(self, name: str):
+        if self.shares_cached_globals:
+            self._own_cached_globals()
+        self.cached_globals.add(name)
+
     def __hash__(self):
         # use object's actual id for hashing
         return id(self)
@@ -221,7 +545,7 @@ class Scope:
         return False
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class CallInfo:
     """Information about a function call."""
     full_name: str          # "table.insert", "db.actor", "pairs"
@@ -237,20 +561,20 @@ class CallInfo:
     branch_index: int = -1  # 0=main if, 1=elseif[0], 2=elseif[1], etc., -1=else or not in if
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class AssignInfo:
     """Information about an assignment."""
     target: str             # variable name
     value_type: str         # 'call', 'index', 'concat', 'literal', 'other'
-    value_repr: str         # string representation
     line: int
-    node: Node
+    node: Node              # assigned value
     scope: Scope
     is_local: bool = False
     in_loop: bool = False
+    value_repr: Optional[str] = None  # string representation, see ASTAnalyzer._assign_value_repr
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ConcatInfo:
     """Information about string concatenation."""
     target: Optional[str]   # variable being assigned to
@@ -260,10 +584,11 @@ class ConcatInfo:
     in_loop: bool = False
     loop_depth: int = 0
     loop_scope: Optional[Scope] = None  # the innermost loop scope
-    right_expr: Optional[str] = None    # string repr of right side of concat
+    right_expr: Optional[str] = None    # string repr of right side of concat, see ASTAnalyzer._concat_right_expr
+    right_node: Optional[Node] = None   # right side of concat, stringified on demand
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class NilSourceInfo:
     """Information about a variable assigned from a nil-returning function."""
     var_name: str           # variable name
@@ -275,7 +600,7 @@ class NilSourceInfo:
     is_guarded: bool = False  # whether a nil check was found after assignment
 
 
-@dataclass 
+@dataclass(**_DATACLASS_SLOTS)
 class NilAccessInfo:
     """Information about accessing a potentially nil variable."""
     var_name: str           # the variable being accessed
@@ -286,7 +611,7 @@ class NilAccessInfo:
     is_safe_to_fix: bool = False  # whether this can be auto-fixed
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class DeadCodeInfo:
     """Information about dead/unreachable code."""
     dead_type: str          # 'after_return', 'after_break', 'if_false', 'while_false', 'unused_local_var', 'unused_local_func'
@@ -299,7 +624,7 @@ class DeadCodeInfo:
     node: Optional[Node] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class LocalVarInfo:
     """Information about a local variable for dead code analysis."""
     name: str
@@ -315,11 +640,23 @@ class LocalVarInfo:
 class ASTAnalyzer:
     """AST-based Lua code analyzer."""
 
-    def __init__(self, cache_threshold: int = 4, experimental: bool = False):
+    # populated after the class body, see bottom of module
+    _HANDLERS: Dict[type, Any] = {}
+
+    def __init__(self, cache_threshold: int = 4, experimental: bool = False,
+                 cache_dir: Optional[Path] = None):
         self.cache_threshold = cache_threshold
         self.experimental = experimental
+        # optional on-disk findings cache, keyed by a hash of the file contents
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        # in-memory findings per (path, mtime_ns, size), survives reset()
+        self._memo: Dict[Tuple[str, int, int], List[Finding]] = {}
         self.reset()
 
+    def clear_cache(self):
+        """Drop memoized findings, for long-running callers."""
+        self._memo.clear()
+
     def reset(self):
         """Reset analyzer state."""
         self.findings: List[Finding] = []
@@ -328,43 +665,82 @@ class ASTAnalyzer:
         self.global_scope: Optional[Scope] = None
 
         self.calls: List[CallInfo] = []
+        self.calls_by_name: Dict[str, List[CallInfo]] = {}  # full_name -> calls, in call order
         self.assigns: List[AssignInfo] = []
-        self.concats: List[ConcatInfo] = []
-        self.global_writes: List[Tuple[str, int]] = []
+        self.concats: List[ConcatInfo] = []  # in-loop self-concats, see _record_assignment
+        self.global_writes: List[Tuple[str, int]] = []  # reportable ones only, see _visit_Assign
+
+        # calls for the call-based passes, bucketed as they are recorded
+        self._call_passes: Dict[str, List[CallInfo]] = {'deprecated': [], 'debug': [], 'oxlib': []}
+        # self.calls grouped by enclosing function scope, then by name
+        self._scope_calls: Dict[Scope, Dict[str, List[CallInfo]]] = {}
+        self._expensive_scope_calls: Dict[Scope, Dict[str, List[CallInfo]]] = {}
         
         # nil access tracking
-        self.nil_sources: Dict[Tuple[int, str], NilSourceInfo] = {}  # (scope_id, var_name) -> nil source info
+        self.nil_sources: Dict[Scope, Dict[str, NilSourceInfo]] = {}  # scope -> var_name -> nil source info
         self.nil_accesses: List[NilAccessInfo] = []      # potential nil accesses
         self.nil_guards: Set[Tuple[str, int]] = set()    # (var_name, line) pairs where nil check exists
         
         # dead code tracking
         self.dead_code: List[DeadCodeInfo] = []
-        self.local_vars: Dict[Tuple[int, str], LocalVarInfo] = {}  # (scope_id, name) -> info
-        self.local_funcs: Dict[Tuple[int, str], LocalVarInfo] = {}  # (scope_id, name) -> info
+        self.local_vars: Dict[Scope, Dict[str, LocalVarInfo]] = {}  # scope -> name -> info
+        self.local_funcs: Dict[Scope, Dict[str, LocalVarInfo]] = {}  # scope -> name -> info
         self.callback_registrations: Set[str] = set()  # names registered as callbacks
+        # filled by _index_ast
+        self._ast_nodes: List[Node] = []
+        self._nodes_by_type: Dict[type, List[Node]] = {}
+        # filled by _collect_symbol_facts
+        self._local_var_defs: Dict[str, LocalVarInfo] = {}
+        self._local_func_defs: Dict[str, LocalVarInfo] = {}
+        self._called_funcs: Set[str] = set()
 
         # Lua optimization tracking
         self.functions_in_loops: List[Tuple[int, str, Node]] = []  # (line, name, node)
-        self.length_ops_in_loops: List[Tuple[int, str, Scope]] = []  # (line, table_name, scope)
+        self.length_ops_in_loops: Dict[Tuple[Scope, str], List[int]] = {}  # (scope, table_name) -> lines
         self.forin_loops: List[Tuple[int, str, List[str], Node]] = []  # (line, iterator, targets, node)
 
-        self.source_lines: List[str] = []
+        # 1-based source lines, _lines1[n] is line n
+        self._lines1: Tuple[str, ...] = ('',)
+        self._nlines: int = 0
+        self._stripped_lines: List[Optional[str]] = [None]  # 1-based like _lines1, filled lazily
+        self._rstripped_lines: List[Optional[str]] = [None]  # same, trailing whitespace only
         self.source: str = ""
         self.file_path: Optional[Path] = None
 
         self.loop_depth: int = 0
-        self.function_depth: int = 0
+
+        # node id -> line, the AST is kept alive for the whole file so ids are stable
+        self._line_cache: Dict[int, int] = {}
+        self._end_line_cache: Dict[int, int] = {}
+        self._node_str_cache: Dict[int, str] = {}
+        self._nil_guard_res: Dict[str, re.Pattern] = {}
+        self._guard_lines: Optional[List[int]] = None
+        self._line_flags: Optional[array] = None
         
         # if-chain tracking for experimental branch-aware counting
         self.current_if_chain: Optional[Node] = None  # current If node
         self.current_branch_index: int = -1  # which branch we're in
 
     def analyze_file(self, file_path: Path) -> List[Finding]:
-        """Analyze a Lua file and return findings."""
+        """Analyze a Lua file and return findings.
+
+        Per-file state (source, _lines1, _ast_tree) is only fully filled in
+        when the file is actually parsed. On a memo or disk cache hit only the
+        returned findings are valid, the rest may be left reset.
+        """
         self.reset()
         self.file_path = file_path
         self._ast_tree = None
 
+        try:
+            st = os.stat(file_path)
+            memo_key = (str(file_path), st.st_mtime_ns, st.st_size)
+        except OSError:
+            memo_key = None
+        if memo_key in self._memo:
+            self.findings = _copy_findings(self._memo[memo_key])
+            return self.findings
+
         try:
             # use latin-1 encoding which maps bytes 0-255 directly to unicode 0-255
             # this preserves non-UTF-8 characters (like Windows-1252 bullet points)
@@ -373,18 +749,42 @@ class ASTAnalyzer:
         except Exception:
             return []
 
-        self.source_lines = self.source.splitlines()
+        # empty and comment-only files (stubs, disabled scripts) skip the parser
+        if not _has_code(self.source):
+            if memo_key:
+                self._memo[memo_key] = []
+            return []
+
+        cache_path = self._findings_cache_path() if self.cache_dir else None
+        if cache_path:
+            cached = self._load_cached_findings(cache_path)
+            if cached is not None:
+                self.findings = cached
+                if memo_key:
+                    self._memo[memo_key] = _copy_findings(cached)
+                return self.findings
+
+        lines = self.source.splitlines()
+        self._nlines = len(lines)
+        self._lines1 = ('', *lines)
+        self._stripped_lines = [None] * (self._nlines + 1)
+        self._rstripped_lines = [None] * (self._nlines + 1)
 
         try:
             # suppress ANTLR lexer error output during parse
             old_stderr = sys.stderr
-            sys.stderr = io.StringIO()
+            sys.stderr = _DEVNULL
             try:
                 tree = ast.parse(self.source)
             finally:
                 sys.stderr = old_stderr
         except Exception:
-            # parse error, skip
+            # parse error, skip. the result is cached like any other, so a
+            # broken file isn't run through the (slow) parser again next time
+            if cache_path:
+                self._store_cached_findings(cache_path)
+            if memo_key:
+                self._memo[memo_key] = []
             return []
 
         # store AST tree for dead code analysis
@@ -394,9 +794,10 @@ class ASTAnalyzer:
         self.global_scope = Scope(
             name='<global>',
             start_line=1,
-            end_line=len(self.source_lines),
+            end_line=self._nlines,
             scope_type='global',
         )
+        self.global_scope.function_scope = self.global_scope
         self.current_scope = self.global_scope
         self.scopes.append(self.global_scope)
 
@@ -406,175 +807,165 @@ class ASTAnalyzer:
         # analyze collected data
         self._analyze_patterns()
 
+        if cache_path:
+            self._store_cached_findings(cache_path)
+        if memo_key:
+            self._memo[memo_key] = _copy_findings(self.findings)
+
         return self.findings
 
+    def _findings_cache_path(self) -> Path:
+        """Cache file for the current source and analyzer settings."""
+        digest = hashlib.blake2b(self.source.encode('latin-1'), digest_size=16).hexdigest()
+        flags = f"t{self.cache_threshold}{'x' if self.experimental else ''}"
+        return self.cache_dir / f"v{ANALYZER_CACHE_VERSION}" / f"{digest}-{flags}.pkl"
+
+    def _load_cached_findings(self, cache_path: Path) -> Optional[List[Finding]]:
+        """Load cached findings, None if missing or unreadable."""
+        try:
+            with open(cache_path, 'rb') as f:
+                findings = pickle.load(f)
+        except Exception:
+            return None
+        return findings if isinstance(findings, list) else None
+
+    def _store_cached_findings(self, cache_path: Path):
+        """Write findings to the cache, best effort."""
+        tmp_path = None
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temp file and rename so parallel workers never see partial files
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(self.findings, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
     def _get_line(self, node: Node) -> int:
         """Extract line number from node."""
-        ft = getattr(node, 'first_token', None)
-        if ft:
-            s = str(ft)
-            if ',' in s:
-                parts = s.rsplit(',', 1)
-                if len(parts) == 2:
-                    line_col = parts[1].rstrip(']')
-                    if ':' in line_col:
-                        try:
-                            return int(line_col.split(':')[0])
-                        except ValueError:
-                            pass
-        return 0
+        key = id(node)
+        line = self._line_cache.get(key)
+        if line is None:
+            line = self._line_cache[key] = self._parse_token_line(getattr(node, 'first_token', None))
+        return line
+
+    def _parse_token_line(self, token) -> int:
+        """Line number of an ANTLR token (0 if unknown)."""
+        # CommonToken carries the line as an int, no need to format and
+        # re-parse its "[@idx,start:stop='text',<type>,line:col]" string
+        if token is None:
+            return 0
+        return token.line or 0
 
     def _get_node_source(self, node: Node) -> str:
         """Get source text for a node (approximate)."""
-        line = self._get_line(node)
-        if 0 < line <= len(self.source_lines):
-            return self.source_lines[line - 1].strip()
+        return self._get_stripped_line(self._get_line(node))
+
+    def _get_stripped_line(self, line_num: int) -> str:
+        """Get a source line with surrounding whitespace removed (cached)."""
+        if 0 < line_num <= self._nlines:
+            stripped = self._stripped_lines[line_num]
+            if stripped is None:
+                stripped = self._stripped_lines[line_num] = self._lines1[line_num].strip()
+            return stripped
         return ""
 
     def _node_to_string(self, node: Node) -> str:
         """Convert an AST node to its string representation."""
-        if isinstance(node, Name):
-            return node.id
-        elif isinstance(node, Number):
-            return str(node.n)
-        elif isinstance(node, String):
-            s = node.s
-            if isinstance(s, bytes):
-                s = s.decode('utf-8', errors='replace')
-            # use single quotes if string contains double quotes
-            if '"' in s and "'" not in s:
-                return f"'{s}'"
-            return f'"{s}"'
-        elif isinstance(node, (TrueExpr,)):
-            return "true"
-        elif isinstance(node, (FalseExpr,)):
-            return "false"
-        elif isinstance(node, (Nil,)):
-            return "nil"
-        elif isinstance(node, Index):
-            value = self._node_to_string(node.value)
-            idx = self._node_to_string(node.idx)
-            # determine bracket vs dot notation:
-            # - dot notation (t.field): idx.first_token is None
-            # - bracket notation (t[key]): idx.first_token has a value
-            idx_token = getattr(node.idx, 'first_token', None)
-            if idx_token is not None and str(idx_token) != 'None':
-                # bracket notation: t[key]
-                return f"{value}[{idx}]"
-            else:
-                # dot notation: t.field
-                return f"{value}.{idx}"
-        elif isinstance(node, Call):
-            func = self._node_to_string(node.func)
-            args = ", ".join(self._node_to_string(a) for a in node.args)
-            return f"{func}({args})"
-        elif isinstance(node, Invoke):
-            source = self._node_to_string(node.source)
-            func = self._node_to_string(node.func)
-            args = ", ".join(self._node_to_string(a) for a in node.args)
-            return f"{source}:{func}({args})"
-        elif isinstance(node, ULengthOP):
-            return f"#{self._node_to_string(node.operand)}"
-        elif isinstance(node, UMinusOp):
-            return f"-{self._node_to_string(node.operand)}"
-        elif isinstance(node, ULNotOp):
-            return f"not {self._node_to_string(node.operand)}"
-        elif isinstance(node, UBNotOp):
-            return f"~{self._node_to_string(node.operand)}"
-        elif isinstance(node, Concat):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} .. {right}"
-        elif isinstance(node, OrLoOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"({left} or {right})"
-        elif isinstance(node, AndLoOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"({left} and {right})"
-        elif isinstance(node, AddOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} + {right}"
-        elif isinstance(node, SubOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} - {right}"
-        elif isinstance(node, MultOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} * {right}"
-        elif isinstance(node, FloatDivOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} / {right}"
-        elif isinstance(node, ModOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} % {right}"
-        elif isinstance(node, ExpoOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} ^ {right}"
-        elif isinstance(node, EqToOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} == {right}"
-        elif isinstance(node, NotEqToOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} ~= {right}"
-        elif isinstance(node, LessThanOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} < {right}"
-        elif isinstance(node, GreaterThanOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} > {right}"
-        elif isinstance(node, LessOrEqThanOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} <= {right}"
-        elif isinstance(node, GreaterOrEqThanOp):
-            left = self._node_to_string(node.left)
-            right = self._node_to_string(node.right)
-            return f"{left} >= {right}"
-        elif isinstance(node, Table):
-            return "{...}"
+        key = id(node)
+        text = self._node_str_cache.get(key)
+        if text is None:
+            fn = _NODE_STR.get(type(node))
+            text = fn(self, node) if fn else f"<{type(node).__name__}>"
+            self._node_str_cache[key] = text
+        return text
+
+    def _string_to_string(self, node: String) -> str:
+        s = node.s
+        if type(s) is bytes:
+            s = s.decode('utf-8', errors='replace')
+        # use single quotes if string contains double quotes
+        if '"' in s and "'" not in s:
+            return f"'{s}'"
+        return f'"{s}"'
+
+    def _index_to_string(self, node: Index) -> str:
+        value = self._node_to_string(node.value)
+        idx = self._node_to_string(node.idx)
+        # determine bracket vs dot notation:
+        # - dot notation (t.field): idx.first_token is None
+        # - bracket notation (t[key]): idx.first_token has a value
+        # (a CommonToken or None, no need to format it to tell)
+        if getattr(node.idx, 'first_token', None) is not None:
+            # bracket notation: t[key]
+            return f"{value}[{idx}]"
         else:
-            return f"<{type(node).__name__}>"
+            # dot notation: t.field
+            return f"{value}.{idx}"
+
+    def _call_to_string(self, node: Call) -> str:
+        func = self._node_to_string(node.func)
+        args = ", ".join(self._node_to_string(a) for a in node.args)
+        return f"{func}({args})"
+
+    def _invoke_to_string(self, node: Invoke) -> str:
+        source = self._node_to_string(node.source)
+        func = self._node_to_string(node.func)
+        args = ", ".join(self._node_to_string(a) for a in node.args)
+        return f"{source}:{func}({args})"
 
     def _get_call_name(self, node: Call) -> Tuple[Optional[str], str, str]:
         """Get module, function, and full name from a Call node."""
         func = node.func
 
-        if isinstance(func, Name):
+        # names are interned, they end up in a lot of sets and dict keys
+        # exact type checks: no luaparser node subclasses Name or Index
+        func_type = type(func)
+        if func_type is Name:
             # bare function: pairs(), time_global()
-            return None, func.id, func.id
-        elif isinstance(func, Index):
+            name = sys.intern(func.id)
+            return None, name, name
+        elif func_type is Index:
             # module.func: table.insert(), db.actor
-            if isinstance(func.value, Name) and isinstance(func.idx, Name):
-                module = func.value.id
-                fn = func.idx.id
-                return module, fn, f"{module}.{fn}"
+            value, idx = func.value, func.idx
+            if type(value) is Name and type(idx) is Name:
+                module = sys.intern(value.id)
+                fn = sys.intern(idx.id)
+                return module, fn, sys.intern(f"{module}.{fn}")
 
         return None, "", ""
 
     def _enter_scope(self, name: str, line: int, scope_type: str = 'block', is_hot: bool = False):
         """Enter a new scope."""
+        parent = self.current_scope
         new_scope = Scope(
             name=name,
             start_line=line,
-            parent=self.current_scope,
+            parent=parent,
             scope_type=scope_type,
-            is_hot_callback=is_hot or (self.current_scope and self.current_scope.is_hot_callback),
+            # hot-ness is inherited, anything nested in a hot callback is hot too
+            is_hot_callback=is_hot or (parent is not None and parent.is_hot_callback),
         )
 
-        # inherit cached globals from parent
-        if self.current_scope:
-            new_scope.cached_globals = set(self.current_scope.cached_globals)
+        # inherit cached globals from parent. most scopes never add any, so
+        # the sets are shared and whichever side writes first copies them
+        if parent is not None:
+            new_scope.cached_globals = parent.cached_globals
+            new_scope.shares_cached_globals = parent.shares_cached_globals = True
+            new_scope.visible_locals = parent.visible_locals
+            if parent.visible_nil:
+                new_scope.visible_nil = dict(parent.visible_nil)
+            new_scope.loop_scope = parent.loop_scope
+            new_scope.function_scope = parent.function_scope
+        if scope_type == 'loop':
+            new_scope.loop_scope = new_scope
+        elif scope_type == 'function':
+            new_scope.function_scope = new_scope
 
         self.scopes.append(new_scope)
         self.current_scope = new_scope
@@ -586,49 +977,49 @@ class ASTAnalyzer:
             self.current_scope.end_line = end_line
             self.current_scope = self.current_scope.parent
 
-    def _is_cached(self, name: str) -> bool:
-        """Check if a global is cached in current scope chain."""
-        scope = self.current_scope
-        while scope:
-            if name in scope.cached_globals or name in scope.locals:
-                return True
-            scope = scope.parent
-        return False
-
     def _visit(self, node: Node):
         """Visit a node and dispatch to specific handler."""
-        if node is None:
-            return
-
-        handler = getattr(self, f'_visit_{type(node).__name__}', None)
-        if handler:
-            handler(node)
-        else:
-            self._visit_children(node)
+        # one lookup decides everything: leaf types map to None, types
+        # without a handler are missing and fall back to the generic walk
+        handler = self._HANDLERS.get(type(node), _VISIT_CHILDREN)
+        if handler is not None:
+            handler(self, node)
+
+    def _visit_nodes(self, nodes: List[Node]):
+        """Visit a list of nodes, dispatching each like _visit does."""
+        # one frame for the whole list instead of a _visit frame per item
+        handlers = self._HANDLERS
+        for item in nodes:
+            handler = handlers.get(type(item), _VISIT_CHILDREN)
+            if handler is not None:
+                handler(self, item)
 
     def _visit_children(self, node: Node):
         """Visit all children of a node."""
-        try:
-            node_dict = vars(node) if hasattr(node, '__dict__') else {}
-        except TypeError:
-            node_dict = {}
-
-        for key, value in node_dict.items():
-            if key.startswith('_'):
-                continue
+        attrs = _CHILD_ATTRS.get(type(node))
+        if attrs is None:
+            attrs = _scan_child_attrs(node)
+
+        # dispatch inline rather than through _visit, saves a frame per child
+        handlers = self._HANDLERS
+        for key in attrs:
+            value = getattr(node, key, None)
             if isinstance(value, Node):
-                self._visit(value)
+                handler = handlers.get(type(value), _VISIT_CHILDREN)
+                if handler is not None:
+                    handler(self, value)
             elif isinstance(value, list):
                 for item in value:
                     if isinstance(item, Node):
-                        self._visit(item)
+                        handler = handlers.get(type(item), _VISIT_CHILDREN)
+                        if handler is not None:
+                            handler(self, item)
 
     def _visit_Chunk(self, node: Chunk):
         self._visit(node.body)
 
     def _visit_Block(self, node: Block):
-        for stmt in node.body:
-            self._visit(stmt)
+        self._visit_nodes(node.body)
 
     def _visit_Function(self, node: Function):
         """Handle global function definition."""
@@ -639,22 +1030,20 @@ class ASTAnalyzer:
         if self.loop_depth > 0:
             self.functions_in_loops.append((line, func_name, node))
 
-        is_hot = func_name in HOT_CALLBACKS
+        is_hot = bool(NAME_KIND.get(func_name, 0) & NAME_HOT)
 
-        self.function_depth += 1
         self._enter_scope(func_name, line, 'function', is_hot)
 
         # register parameters as locals
         if hasattr(node, 'args') and node.args:
             for arg in node.args:
                 if isinstance(arg, Name):
-                    self.current_scope.locals.add(arg.id)
+                    self.current_scope.add_local(sys.intern(arg.id))
 
         self._visit(node.body)
 
         end_line = self._get_end_line(node)
         self._exit_scope(end_line)
-        self.function_depth -= 1
 
     def _visit_LocalFunction(self, node: LocalFunction):
         """Handle local function definition."""
@@ -667,23 +1056,21 @@ class ASTAnalyzer:
 
         # register function name in parent scope
         if self.current_scope:
-            self.current_scope.locals.add(func_name)
+            self.current_scope.add_local(sys.intern(func_name))
 
-        is_hot = func_name in HOT_CALLBACKS
+        is_hot = bool(NAME_KIND.get(func_name, 0) & NAME_HOT)
 
-        self.function_depth += 1
         self._enter_scope(func_name, line, 'function', is_hot)
 
         if hasattr(node, 'args') and node.args:
             for arg in node.args:
                 if isinstance(arg, Name):
-                    self.current_scope.locals.add(arg.id)
+                    self.current_scope.add_local(sys.intern(arg.id))
 
         self._visit(node.body)
 
         end_line = self._get_end_line(node)
         self._exit_scope(end_line)
-        self.function_depth -= 1
 
     def _visit_Method(self, node: Method):
         """Handle method definition."""
@@ -695,40 +1082,31 @@ class ASTAnalyzer:
         else:
             func_name = self._node_to_string(node.name) if node.name else '<method>'
 
-        is_hot = func_name in HOT_CALLBACKS
+        is_hot = bool(NAME_KIND.get(func_name, 0) & NAME_HOT)
 
-        self.function_depth += 1
         self._enter_scope(func_name, line, 'function', is_hot)
 
         # 'self' is implicit first param
-        self.current_scope.locals.add('self')
+        self.current_scope.add_local('self')
 
         if hasattr(node, 'args') and node.args:
             for arg in node.args:
                 if isinstance(arg, Name):
-                    self.current_scope.locals.add(arg.id)
+                    self.current_scope.add_local(sys.intern(arg.id))
 
         self._visit(node.body)
 
         end_line = self._get_end_line(node)
         self._exit_scope(end_line)
-        self.function_depth -= 1
 
     def _get_end_line(self, node: Node) -> int:
         """Try to get end line of a node."""
-        lt = getattr(node, 'last_token', None)
-        if lt:
-            s = str(lt)
-            if ',' in s:
-                parts = s.rsplit(',', 1)
-                if len(parts) == 2:
-                    line_col = parts[1].rstrip(']')
-                    if ':' in line_col:
-                        try:
-                            return int(line_col.split(':')[0])
-                        except ValueError:
-                            pass
-        return self._get_line(node)
+        key = id(node)
+        line = self._end_line_cache.get(key)
+        if line is None:
+            line = self._parse_token_line(getattr(node, 'last_token', None)) or self._get_line(node)
+            self._end_line_cache[key] = line
+        return line
 
     def _visit_Forin(self, node: Forin):
         """Handle for-in loop."""
@@ -746,8 +1124,7 @@ class ASTAnalyzer:
             self.forin_loops.append((line, iterator_name, target_names, node))
 
         # visit iterator expression first (outside loop scope)
-        for iter_expr in node.iter:
-            self._visit(iter_expr)
+        self._visit_nodes(node.iter)
 
         self.loop_depth += 1
         self._enter_scope('<forin>', line, 'loop')
@@ -755,7 +1132,7 @@ class ASTAnalyzer:
         # loop variables are local to loop
         for target in node.targets:
             if isinstance(target, Name):
-                self.current_scope.locals.add(target.id)
+                self.current_scope.add_local(sys.intern(target.id))
 
         self._visit(node.body)
 
@@ -777,7 +1154,7 @@ class ASTAnalyzer:
         self._enter_scope('<fornum>', line, 'loop')
 
         if isinstance(node.target, Name):
-            self.current_scope.locals.add(node.target.id)
+            self.current_scope.add_local(sys.intern(node.target.id))
 
         self._visit(node.body)
 
@@ -834,7 +1211,7 @@ class ASTAnalyzer:
         self.current_if_chain = prev_if_chain
         self.current_branch_index = prev_branch_index
     
-    def _visit_orelse(self, node, branch_idx):
+    def _visit_orelse(self, node: Optional[Node], branch_idx: int):
         """Helper to visit elseif/else with branch tracking."""
         if isinstance(node, ElseIf):
             # elseif branch
@@ -860,11 +1237,12 @@ class ASTAnalyzer:
     def _visit_LocalAssign(self, node: LocalAssign):
         """Handle local assignment."""
         line = self._get_line(node)
+        scope = self.current_scope
 
         # register targets as locals
         for target in node.targets:
             if isinstance(target, Name):
-                self.current_scope.locals.add(target.id)
+                scope.add_local(sys.intern(target.id))
 
         # check for caching pattern: local xyz = module.func
         if len(node.targets) == 1 and len(node.values) == 1:
@@ -877,24 +1255,25 @@ class ASTAnalyzer:
                 # check if caching a module.func
                 if isinstance(value, Index):
                     if isinstance(value.value, Name) and isinstance(value.idx, Name):
+                        # only cacheable names are ever looked up in
+                        # cached_globals, anything else (math.pi, data.x) is skipped
                         module = value.value.id
                         func = value.idx.id
-                        full_name = f"{module}.{func}"
-
-                        if module in CACHEABLE_MODULE_FUNCS:
-                            self.current_scope.cached_globals.add(full_name)
+                        if func in CACHEABLE_MODULE_FUNCS.get(module, ()):
+                            # same string object as the call names it gets compared with
+                            full_name = sys.intern(f"{module}.{func}")
+                            scope.add_cached_global(full_name)
 
                 # check if caching a bare global
                 elif isinstance(value, Name):
                     if value.id in CACHEABLE_BARE_GLOBALS:
-                        self.current_scope.cached_globals.add(value.id)
+                        scope.add_cached_global(value.id)
 
                 # record assignment info
                 self._record_assignment(target_name, value, line, is_local=True)
 
         # visit values
-        for value in node.values:
-            self._visit(value)
+        self._visit_nodes(node.values)
 
     def _visit_Assign(self, node: Assign):
         """Handle assignment."""
@@ -904,93 +1283,72 @@ class ASTAnalyzer:
         for target in node.targets:
             if isinstance(target, Name):
                 target_name = target.id
-                # it's a global write if not in any scope's locals
-                if not self._is_in_locals(target_name):
+                # it's a global write if not in any scope's locals. _private and
+                # CONSTANT names are intentional and never reported, skip them early
+                intentional = target_name.startswith('_') or target_name.isupper()
+                if not intentional and not self._is_in_locals(target_name):
                     self.global_writes.append((target_name, line))
 
                 if len(node.values) == 1:
                     self._record_assignment(target_name, node.values[0], line, is_local=False)
 
         # visit targets (for calls inside index expressions like db.storage[npc:id()])
-        for target in node.targets:
-            self._visit(target)
+        self._visit_nodes(node.targets)
 
         # visit values
-        for value in node.values:
-            self._visit(value)
+        self._visit_nodes(node.values)
 
     def _is_in_locals(self, name: str) -> bool:
         """Check if name is in any scope's locals."""
-        scope = self.current_scope
-        while scope:
-            if name in scope.locals:
-                return True
-            scope = scope.parent
-        return False
+        return self.current_scope is not None and name in self.current_scope.visible_locals
 
     def _record_assignment(self, target: str, value: Node, line: int, is_local: bool):
         """Record an assignment for analysis."""
-        if isinstance(value, Call):
-            value_type = 'call'
-            value_repr = self._node_to_string(value)
-        elif isinstance(value, Index):
-            value_type = 'index'
-            value_repr = self._node_to_string(value)
-        elif isinstance(value, Concat):
-            value_type = 'concat'
-            value_repr = self._node_to_string(value)
-
-            # record concat info
-            left_var = None
-            if isinstance(value.left, Name):
-                left_var = value.left.id
-            
-            # get the right side expression
-            right_expr = self._node_to_string(value.right)
-            
-            # find innermost loop scope
-            loop_scope = None
-            if self.loop_depth > 0:
-                # walk up scopes to find loop
-                s = self.current_scope
-                while s:
-                    if s.scope_type == 'loop':
-                        loop_scope = s
-                        break
-                    s = s.parent
+        # value_repr is built on demand, most assignments never end up in a finding
+        value_type = _ASSIGN_VALUE_TYPES.get(type(value), 'other')
+        scope = self.current_scope
+        loop_depth = self.loop_depth
 
+        # record concat info, only self-concats (s = s .. x) in loops are ever reported
+        if (value_type == 'concat' and loop_depth > 0 and
+                isinstance(value.left, Name) and value.left.id == target):
             self.concats.append(ConcatInfo(
                 target=target,
-                left_var=left_var,
+                left_var=target,
                 line=line,
-                scope=self.current_scope,
-                in_loop=self.loop_depth > 0,
-                loop_depth=self.loop_depth,
-                loop_scope=loop_scope,
-                right_expr=right_expr,
+                scope=scope,
+                in_loop=True,
+                loop_depth=loop_depth,
+                loop_scope=scope.loop_scope,
+                right_node=value.right,
             ))
-        elif isinstance(value, (Number, String, TrueExpr, FalseExpr, Nil)):
-            value_type = 'literal'
-            value_repr = self._node_to_string(value)
-        else:
-            value_type = 'other'
-            value_repr = self._node_to_string(value)
 
         self.assigns.append(AssignInfo(
             target=target,
             value_type=value_type,
-            value_repr=value_repr,
             line=line,
             node=value,
-            scope=self.current_scope,
+            scope=scope,
             is_local=is_local,
-            in_loop=self.loop_depth > 0,
+            in_loop=loop_depth > 0,
         ))
         
         # Track nil-returning function assignments
-        self._track_nil_source(target, value, value_repr, line, is_local)
+        self._track_nil_source(target, value, line, is_local)
+
+    def _assign_value_repr(self, assign: AssignInfo) -> str:
+        """String form of an assignment's value, built on first use."""
+        if assign.value_repr is None:
+            assign.value_repr = self._node_to_string(assign.node)
+        return assign.value_repr
+
+    def _concat_right_expr(self, concat: ConcatInfo) -> Optional[str]:
+        """String form of a concat's right side, built on first use."""
+        if concat.right_expr is None and concat.right_node is not None:
+            concat.right_expr = self._node_to_string(concat.right_node)
+        return concat.right_expr
 
-    def _track_nil_source(self, target: str, value: Node, value_repr: str, line: int, is_local: bool):
+    def _track_nil_source(self, target: str, value: Node, line: int, is_local: bool):
         """Track if a variable is assigned from a nil-returning function."""
         source_func = None
         
@@ -998,39 +1356,45 @@ class ASTAnalyzer:
         if isinstance(value, Call):
             # get the function name
             _, _, full_name = self._get_call_name(value)
-            if full_name and full_name in NIL_RETURNING_FUNCTIONS:
+            if full_name and full_name in NIL_RETURNING_FUNCS:
                 source_func = full_name
         
         # Check for method call (Invoke) - e.g., obj:parent()
         elif isinstance(value, Invoke):
             method_name = value.func.id if isinstance(value.func, Name) else ''
-            method_pattern = f':{method_name}'
-            if method_pattern in NIL_RETURNING_FUNCTIONS:
-                source_func = method_pattern
+            if method_name in NIL_RETURNING_METHODS:
+                source_func = ':' + method_name
         
         # Check for index access - e.g., db.actor, alife():object(id)
         elif isinstance(value, Index):
             full_name = self._node_to_string(value)
             # check direct matches like db.actor
-            if full_name in NIL_RETURNING_FUNCTIONS:
+            if full_name in NIL_RETURNING_FUNCS:
                 source_func = full_name
         
+        scope = self.current_scope
         if source_func:
-            key = (id(self.current_scope), target)
-            self.nil_sources[key] = NilSourceInfo(
+            info = NilSourceInfo(
                 var_name=target,
-                source_call=value_repr,
+                source_call=self._node_to_string(value),
                 source_func=source_func,
                 assign_line=line,
-                scope=self.current_scope,
+                scope=scope,
                 is_local=is_local,
                 is_guarded=False,
             )
+            self.nil_sources.setdefault(scope, {})[target] = info
+            scope.visible_nil[target] = info
         else:
             # if variable is reassigned from non-nil source, remove from tracking
-            key = (id(self.current_scope), target)
-            if key in self.nil_sources:
-                del self.nil_sources[key]
+            scope_sources = self.nil_sources.get(scope)
+            if scope_sources and scope_sources.pop(target, None) is not None:
+                # an enclosing scope's nil source for the same name shows through again
+                inherited = scope.parent.visible_nil.get(target) if scope.parent else None
+                if inherited is not None:
+                    scope.visible_nil[target] = inherited
+                else:
+                    del scope.visible_nil[target]
 
     def _check_nil_access(self, source_node: Node, source_str: str, full_call: str, line: int, access_type: str):
         """Check if we're accessing a potentially nil variable."""
@@ -1065,43 +1429,71 @@ class ASTAnalyzer:
 
     def _find_nil_source(self, var_name: str) -> Optional[NilSourceInfo]:
         """Find nil source for a variable in current or enclosing scopes."""
-        # key is (scope_id, var_name)
-        scope = self.current_scope
-        while scope:
-            key = (id(scope), var_name)
-            if key in self.nil_sources:
-                return self.nil_sources[key]
-            scope = scope.parent
-        return None
+        if self.current_scope is None:
+            return None
+        return self.current_scope.visible_nil.get(var_name)
 
     def _has_nil_guard(self, var_name: str, assign_line: int, access_line: int) -> bool:
         """Check if there's a nil guard between assignment and access."""
         if assign_line >= access_line:
             return False
         
-        # check lines between assignment and access for nil guard patterns
-        for line_num in range(assign_line, access_line):
-            if line_num <= 0 or line_num > len(self.source_lines):
-                continue
-            line_text = self.source_lines[line_num - 1]
-            
-            # check for common nil guard patterns
-            # if var then / if var and / if not var then return
-            patterns = [
-                f'if {var_name} then',
-                f'if {var_name} and',
-                f'if not {var_name} then',
-                f'if {var_name} ~= nil',
-                f'if {var_name} == nil then return',
-                f'{var_name} and {var_name}:',
-                f'{var_name} and {var_name}.',
-            ]
-            for pattern in patterns:
-                if pattern in line_text:
-                    return True
-        
+        guard_re = self._nil_guard_res.get(var_name)
+        if guard_re is None:
+            guard_re = re.compile('|'.join(
+                re.escape(t.format(var=var_name)) for t in NIL_GUARD_TEMPLATES
+            ))
+            self._nil_guard_res[var_name] = guard_re
+
+        # check lines between assignment and access for nil guard patterns,
+        # only lines that can hold one of them at all are looked at
+        guard_lines = self._get_guard_lines()
+        lines1 = self._lines1
+        lo = bisect_left(guard_lines, assign_line)
+        hi = bisect_left(guard_lines, access_line, lo)
+        for line_num in guard_lines[lo:hi]:
+            line_text = lines1[line_num]
+            # every pattern contains the name, skip the regex for most lines
+            if var_name in line_text and guard_re.search(line_text):
+                return True
+
         return False
 
+    def _get_guard_lines(self) -> List[int]:
+        """Sorted numbers of the lines containing 'if ' or ' and '."""
+        if self._guard_lines is None:
+            self._scan_lines()
+        return self._guard_lines
+
+    def _get_line_flags(self) -> array:
+        """1-based LINE_* flags of every source line."""
+        if self._line_flags is None:
+            self._scan_lines()
+        return self._line_flags
+
+    def _scan_lines(self):
+        """Classify every source line once, on first use by the nil checks."""
+        flags = array('B', bytes(self._nlines + 1))
+        guard_lines = []
+        lines1 = self._lines1
+        for i in range(1, self._nlines + 1):
+            line = lines1[i]
+            f = 0
+            if 'if ' in line:
+                f |= LINE_HAS_IF
+            if ' and ' in line:
+                f |= LINE_HAS_AND
+            if f:
+                guard_lines.append(i)
+            stripped = line.strip()
+            if stripped.startswith('local '):
+                f |= LINE_LOCAL
+            elif stripped.startswith(CONTROL_FLOW_PREFIXES):
+                f |= LINE_CONTROL_FLOW
+            flags[i] = f
+        self._line_flags = flags
+        self._guard_lines = guard_lines
+
     def _is_safe_nil_fix(self, nil_source: NilSourceInfo, access_line: int) -> bool:
         """
         Determine if a nil access is safe to auto-fix.
@@ -1127,22 +1519,16 @@ class ASTAnalyzer:
             return False
         
         # check that the line between is not a control flow statement
-        if nil_source.assign_line <= 0 or nil_source.assign_line > len(self.source_lines):
+        if nil_source.assign_line <= 0 or nil_source.assign_line > self._nlines:
             return False
         
         # check access line content
-        if access_line > 0 and access_line <= len(self.source_lines):
-            access_text = self.source_lines[access_line - 1].strip()
-            
-            # CRITICAL: access line must NOT be a local declaration
-            if access_text.startswith('local '):
+        # CRITICAL: access line must NOT be a local declaration
+        # CRITICAL: access line must NOT be control flow (too complex to wrap)
+        if 0 < access_line <= self._nlines:
+            if self._get_line_flags()[access_line] & (LINE_LOCAL | LINE_CONTROL_FLOW):
                 return False
-            
-            # CRITICAL: access line must NOT be control flow (too complex to wrap)
-            control_keywords = ('if ', 'if(', 'for ', 'while ', 'repeat', 'function ', 'function(')
-            if any(access_text.startswith(kw) for kw in control_keywords):
-                return False
-            
+
         return True
 
     def _visit_Call(self, node: Call):
@@ -1151,7 +1537,8 @@ class ASTAnalyzer:
         module, func, full_name = self._get_call_name(node)
 
         if full_name:
-            self.calls.append(CallInfo(
+            loop_depth = self.loop_depth
+            self._record_call(CallInfo(
                 full_name=full_name,
                 module=module,
                 func=func,
@@ -1159,27 +1546,28 @@ class ASTAnalyzer:
                 line=line,
                 node=node,
                 scope=self.current_scope,
-                in_loop=self.loop_depth > 0,
-                loop_depth=self.loop_depth,
+                in_loop=loop_depth > 0,
+                loop_depth=loop_depth,
                 parent_if_node=self.current_if_chain,
                 branch_index=self.current_branch_index,
             ))
 
         # visit children
         self._visit(node.func)
-        for arg in node.args:
-            self._visit(arg)
+        self._visit_nodes(node.args)
 
     def _visit_Invoke(self, node: Invoke):
         """Handle method call (obj:method())."""
         line = self._get_line(node)
 
-        # record as call
-        source = self._node_to_string(node.source)
-        func = node.func.id if isinstance(node.func, Name) else self._node_to_string(node.func)
-        full_name = f"{source}:{func}"
+        # record as call. interned like plain call names, method names repeat a
+        # lot (self:..., xPlayer:...) and end up as dict keys
+        source = sys.intern(self._node_to_string(node.source))
+        func = sys.intern(node.func.id if isinstance(node.func, Name) else self._node_to_string(node.func))
+        full_name = sys.intern(f"{source}:{func}")
 
-        self.calls.append(CallInfo(
+        loop_depth = self.loop_depth
+        self._record_call(CallInfo(
             full_name=full_name,
             module=source,
             func=func,
@@ -1187,8 +1575,8 @@ class ASTAnalyzer:
             line=line,
             node=node,
             scope=self.current_scope,
-            in_loop=self.loop_depth > 0,
-            loop_depth=self.loop_depth,
+            in_loop=loop_depth > 0,
+            loop_depth=loop_depth,
             parent_if_node=self.current_if_chain,
             branch_index=self.current_branch_index,
         ))
@@ -1197,30 +1585,34 @@ class ASTAnalyzer:
         self._check_nil_access(node.source, source, full_name, line, 'method')
 
         self._visit(node.source)
-        for arg in node.args:
-            self._visit(arg)
-
-    def _visit_Concat(self, node: Concat):
-        """Handle concatenation operator."""
-        line = self._get_line(node)
-
-        left_var = None
-        if isinstance(node.left, Name):
-            left_var = node.left.id
-
-        # only interesting if we're in a loop
-        if self.loop_depth > 0:
-            self.concats.append(ConcatInfo(
-                target=None,  # no assignment context here
-                left_var=left_var,
-                line=line,
-                scope=self.current_scope,
-                in_loop=True,
-                loop_depth=self.loop_depth,
-            ))
-
-        self._visit(node.left)
-        self._visit(node.right)
+        self._visit_nodes(node.args)
+
+    def _record_call(self, call: CallInfo):
+        self.calls.append(call)
+        name = call.full_name
+        calls_by_name = self.calls_by_name
+        calls = calls_by_name.get(name)
+        if calls is None:
+            calls_by_name[name] = [call]
+        else:
+            calls.append(call)
+
+        # bucket for the call-based passes now instead of rescanning self.calls
+        call_passes = self._call_passes
+        if name in DEPRECATED_FUNCS:
+            call_passes['deprecated'].append(call)
+        # math.log is a logarithm, not logging
+        if NAME_KIND.get(call.func, 0) & NAME_DEBUG and not name.startswith('math.'):
+            call_passes['debug'].append(call)
+        if name in OXLIB_CACHE_REPLACEMENTS:
+            call_passes['oxlib'].append(call)
+
+        # group by enclosing function for the repeated-call and uncached passes
+        func_scope = call.scope.function_scope
+        if func_scope:
+            self._scope_calls.setdefault(func_scope, {}).setdefault(name, []).append(call)
+            if name in EXPENSIVE_CALLS:
+                self._expensive_scope_calls.setdefault(func_scope, {}).setdefault(name, []).append(call)
 
     # visitor pass-through for other nodes
     def _visit_Index(self, node: Index):
@@ -1228,8 +1620,7 @@ class ASTAnalyzer:
         self._visit(node.idx)
 
     def _visit_Table(self, node: Table):
-        for field in node.fields:
-            self._visit(field)
+        self._visit_nodes(node.fields)
 
     def _visit_Field(self, node: Field):
         if node.key:
@@ -1237,48 +1628,39 @@ class ASTAnalyzer:
         self._visit(node.value)
 
     def _visit_Return(self, node: Return):
-        for val in node.values:
-            self._visit(val)
-
-    # binary ops
-    def _visit_AddOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_SubOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_MultOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_FloatDivOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_ModOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_ExpoOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_AndLoOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_OrLoOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_LessThanOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_GreaterThanOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_LessOrEqThanOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_GreaterOrEqThanOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_EqToOp(self, node): self._visit(node.left); self._visit(node.right)
-    def _visit_NotEqToOp(self, node): self._visit(node.left); self._visit(node.right)
-
-    # unary ops
-    def _visit_UMinusOp(self, node): self._visit(node.operand)
-    def _visit_UBNotOp(self, node): self._visit(node.operand)
-    def _visit_ULNotOp(self, node): self._visit(node.operand)
-    def _visit_ULengthOP(self, node):
+        self._visit_nodes(node.values)
+
+    # one visitor for every binary / unary op, see _HANDLERS
+    def _visit_binop(self, node: BinaryOp):
+        handlers = self._HANDLERS
+        left, right = node.left, node.right
+        handler = handlers.get(type(left), _VISIT_CHILDREN)
+        if handler is not None:
+            handler(self, left)
+        handler = handlers.get(type(right), _VISIT_CHILDREN)
+        if handler is not None:
+            handler(self, right)
+
+    def _visit_unop(self, node: UnaryOp):
+        operand = node.operand
+        handler = self._HANDLERS.get(type(operand), _VISIT_CHILDREN)
+        if handler is not None:
+            handler(self, operand)
+
+    def _visit_ULengthOP(self, node: ULengthOP):
         # Track length operations in loops
         if self.loop_depth > 0:
+            # grouped right away, the analysis only needs lines per (scope, table)
             operand_name = self._node_to_string(node.operand)
             line = self._get_line(node)
-            self.length_ops_in_loops.append((line, operand_name, self.current_scope))
+            key = (self.current_scope, operand_name)
+            lines = self.length_ops_in_loops.get(key)
+            if lines is None:
+                self.length_ops_in_loops[key] = [line]
+            else:
+                lines.append(line)
         self._visit(node.operand)
 
-    # terminal nodes - no children
-    def _visit_Name(self, node): pass
-    def _visit_Number(self, node): pass
-    def _visit_String(self, node): pass
-    def _visit_Nil(self, node): pass
-    def _visit_TrueExpr(self, node): pass
-    def _visit_FalseExpr(self, node): pass
-    def _visit_SemiColon(self, node): pass
-    def _visit_Comment(self, node): pass
-    def _visit_Break(self, node): pass
-
 
     # PATTERN ANALYSIS
 
@@ -1303,8 +1685,8 @@ class ASTAnalyzer:
 
     def _analyze_table_insert(self):
         """Find table.insert(t, v) that can be t[#t+1] = v."""
-        for call in self.calls:
-            if call.full_name == 'table.insert' and len(call.args) == 2:
+        for call in self.calls_by_name.get('table.insert', ()):
+            if len(call.args) == 2:
                 # 2-arg form: table.insert(t, v)
                 table_name = self._node_to_string(call.args[0])
                 value = self._node_to_string(call.args[1])
@@ -1325,7 +1707,7 @@ class ASTAnalyzer:
 
     def _analyze_deprecated_funcs(self):
         """Find deprecated functions: table.getn, string.len."""
-        for call in self.calls:
+        for call in self._call_passes['deprecated']:
             if call.full_name == 'table.getn' and len(call.args) == 1:
                 arg = self._node_to_string(call.args[0])
                 self.findings.append(Finding(
@@ -1358,14 +1740,17 @@ class ASTAnalyzer:
 
     def _analyze_math_pow(self):
         """Find math.pow that can be simplified."""
-        for call in self.calls:
-            if call.full_name == 'math.pow' and len(call.args) == 2:
-                base = self._node_to_string(call.args[0])
+        for call in self.calls_by_name.get('math.pow', ()):
+            if len(call.args) == 2:
                 exp_node = call.args[1]
 
-                # check for simple cases
+                # check for simple cases, the base is only formatted for those
                 if isinstance(exp_node, Number):
                     exp = exp_node.n
+                    is_power = exp in (2, 3, 4) and self._is_simple_expr(call.args[0])
+                    if exp != 0.5 and not is_power:
+                        continue
+                    base = self._node_to_string(call.args[0])
                     full_match = f'math.pow({base}, {exp})'
 
                     if exp == 0.5:
@@ -1384,7 +1769,7 @@ class ASTAnalyzer:
                             },
                             source_line=self._get_source_line(call.line),
                         ))
-                    elif exp in (2, 3, 4) and self._is_simple_expr(call.args[0]):
+                    else:
                         replacement = '*'.join([base] * int(exp))
                         self.findings.append(Finding(
                             pattern_name='math_pow_simple',
@@ -1404,7 +1789,8 @@ class ASTAnalyzer:
 
     def _is_simple_expr(self, node: Node) -> bool:
         """Check if node is a simple expression (safe to repeat)."""
-        return isinstance(node, (Name, Number))
+        node_type = type(node)
+        return node_type is Name or node_type is Number
     
     def _count_calls_branch_aware(self, calls: List[CallInfo]) -> int:
         """
@@ -1421,13 +1807,13 @@ class ASTAnalyzer:
             return len(calls)
         
         # group calls by if-chain (use id(node) as key since nodes aren't hashable)
-        if_chains: Dict[Optional[int], Dict[int, List[CallInfo]]] = defaultdict(lambda: defaultdict(list))
+        if_chains: Dict[Optional[int], Dict[int, List[CallInfo]]] = {}
         calls_outside_if = []
         
         for call in calls:
             if call.parent_if_node is not None:
                 # in an if-chain - group by (if_node_id, branch_index)
-                if_chains[id(call.parent_if_node)][call.branch_index].append(call)
+                if_chains.setdefault(id(call.parent_if_node), {}).setdefault(call.branch_index, []).append(call)
             else:
                 # not in any if statement
                 calls_outside_if.append(call)
@@ -1444,50 +1830,34 @@ class ASTAnalyzer:
 
     def _analyze_uncached_globals(self):
         """Find frequently used globals that should be cached."""
-        # count calls by full_name, grouped by function scope
-        scope_calls: Dict[Scope, Dict[str, List[CallInfo]]] = defaultdict(lambda: defaultdict(list))
+        name_kind = NAME_KIND.get
+        count_calls = self._count_calls_branch_aware
 
-        for call in self.calls:
-            # find enclosing function scope
-            func_scope = self._find_function_scope(call.scope)
-            if func_scope:
-                scope_calls[func_scope][call.full_name].append(call)
+        # check each function, calls are grouped by _record_call
+        for func_scope, calls_by_name in self._scope_calls.items():
+            # skip global scope - only cache inside actual functions
+            if func_scope.name == '<global>' or func_scope.scope_type == 'global':
+                continue
 
-        # check each function
-        for func_scope, calls_by_name in scope_calls.items():
+            # threshold: configurable (default 4), hot callbacks use threshold-1
+            # with --experimental, use branch-aware counting
+            threshold = self.cache_threshold - 1 if func_scope.is_hot_callback else self.cache_threshold
+            cached_globals = func_scope.cached_globals
             globals_to_cache = {}
 
             for name, calls in calls_by_name.items():
-                # skip if already cached or has direct replacement
-                if name in DIRECT_REPLACEMENT_FUNCS:
-                    continue
-                if name in func_scope.cached_globals:
+                # skip if has direct replacement or isn't a cacheable global
+                kind = name_kind(name, 0)
+                if kind & NAME_DIRECT_REPLACEMENT or not kind & NAME_CACHEABLE:
                     continue
-
-                # check if it's a cacheable global
-                is_bare = name in CACHEABLE_BARE_GLOBALS
-                is_module_func = False
-
-                if '.' in name:
-                    module, func = name.split('.', 1)
-                    if module in CACHEABLE_MODULE_FUNCS and func in CACHEABLE_MODULE_FUNCS[module]:
-                        is_module_func = True
-
-                if not is_bare and not is_module_func:
+                # skip if already cached
+                if name in cached_globals:
                     continue
 
-                # threshold: configurable (default 4), hot callbacks use threshold-1
-                # with --experimental, use branch-aware counting
-                threshold = self.cache_threshold - 1 if func_scope.is_hot_callback else self.cache_threshold
-                call_count = self._count_calls_branch_aware(calls)
-                if call_count >= threshold:
+                if count_calls(calls) >= threshold:
                     globals_to_cache[name] = calls
 
             if globals_to_cache:
-                # skip global scope - only cache inside actual functions
-                if func_scope.name == '<global>' or func_scope.scope_type == 'global':
-                    continue
-
                 # create summary finding for this function
                 example_lines = []
                 for name, calls in list(globals_to_cache.items())[:5]:
@@ -1509,119 +1879,17 @@ class ASTAnalyzer:
                     source_line='\n'.join(example_lines),
                 ))
 
-    def _find_function_scope(self, scope: Scope) -> Optional[Scope]:
-        """Find the enclosing function scope."""
-        while scope:
-            if scope.scope_type == 'function':
-                return scope
-            scope = scope.parent
-        return self.global_scope
-
     def _analyze_repeated_calls_in_scope(self):
         """Find repeated expensive calls within function scope."""
-        # Expensive FiveM native calls to track
-        # These should be cached rather than called repeatedly in tick loops
-        # NOTE: GetGameTimer() is NOT included because it returns different values
-        # each call (current time) - caching it breaks elapsed time calculations
-        expensive_calls = {
-            'PlayerPedId',              # Get player ped - cache once per tick
-            'PlayerId',                 # Get player ID - cache once
-            'GetPlayerServerId',        # Get server ID - cache once
-            'GetEntityCoords',          # Cache coordinates if used multiple times
-            'GetEntityModel',           # Model hash doesn't change - cache it
-            'GetHashKey',               # Hash computation - cache results
-            'GetPlayerPed',             # Get ped from player ID - cache it
-            'GetVehiclePedIsIn',        # Cache vehicle reference
-            'GetEntityHeading',         # Cache heading if used multiple times
-            'GetDistanceBetweenCoords', # Should use vector math #(v1-v2) instead
-            # Entity properties
-            'GetEntityVelocity',        # Velocity vector - cache for multiple reads in same tick
-            'GetEntityRotation',        # Rotation vector - cache if used multiple times
-            'GetEntityHealth',          # Health value - cache for multiple reads
-            'GetEntityMaxHealth',       # Max health - rarely changes, cache it
-            'GetEntitySpeed',           # Speed scalar - cache for multiple reads in same tick
-            'GetEntityForwardVector',   # Forward direction vector - cache it
-            # Vehicle natives
-            'GetVehicleClass',          # Vehicle classification - static per vehicle
-            'GetVehicleEngineHealth',   # Engine health - cache for multiple reads
-            'GetVehicleBodyHealth',     # Body health - cache for multiple reads
-            'GetVehicleNumberPlateText', # Plate text - static per vehicle
-            'GetVehiclePedIsUsing',     # Similar to GetVehiclePedIsIn - cache it
-            # Ped/Player natives
-            'GetSelectedPedWeapon',     # Current weapon hash - cache for multiple reads
-            'GetPedArmour',             # Armor value - cache for multiple reads
-            'IsPedInAnyVehicle',        # Boolean vehicle check - cache for multiple reads
-            'GetPlayerWantedLevel',     # Wanted level - cache for multiple reads
-            'GetPedMaxHealth',          # Max health - rarely changes, cache it
-            # ox_lib functions (expensive lookups)
-            'lib.getClosestPlayer',     # Distance calculations - cache result
-            'lib.getClosestPed',        # Distance calculations - cache result
-            'lib.getClosestVehicle',    # Distance calculations - cache result
-            'lib.getClosestObject',     # Distance calculations - cache result
-            'lib.getNearbyPlayers',     # Entity iteration - cache result
-            'lib.getNearbyPeds',        # Entity iteration - cache result
-            'lib.getNearbyVehicles',    # Entity iteration - cache result
-            'lib.getNearbyObjects',     # Entity iteration - cache result
-            'lib.getCoreObject',        # Framework bridge - cache reference
-            'lib.getPlayer',            # Player data lookup - cache result
-            'lib.progressActive',       # UI state check - cache in tight loops
-        }
-
-        # Method calls that are safe to cache (immutable entity properties)
-        # In FiveM/GTA5, these functions return stable values for an entity
-        cacheable_methods = set()  # FiveM uses natives, not method calls
-
-        # group by function scope
-        scope_calls: Dict[Scope, Dict[str, List[CallInfo]]] = defaultdict(lambda: defaultdict(list))
-
-        for call in self.calls:
-            if call.full_name in expensive_calls:
-                func_scope = self._find_function_scope(call.scope)
-                if func_scope:
-                    scope_calls[func_scope][call.full_name].append(call)
-
-            # track cacheable method calls on objects (:section(), :id(), :clsid())
-            if call.func in cacheable_methods and ':' in call.full_name:
-                func_scope = self._find_function_scope(call.scope)
-                if func_scope:
-                    key = f"{call.full_name}()"
-                    scope_calls[func_scope][key].append(call)
-
-        for func_scope, calls_by_name in scope_calls.items():
+        count_calls = self._count_calls_branch_aware
+        for func_scope, calls_by_name in self._expensive_scope_calls.items():
+            threshold = self.cache_threshold - 1 if func_scope.is_hot_callback else self.cache_threshold
             for name, calls in calls_by_name.items():
-                threshold = self.cache_threshold - 1 if func_scope.is_hot_callback else self.cache_threshold
-                call_count = self._count_calls_branch_aware(calls)
-
-                if call_count >= threshold:
+                if count_calls(calls) >= threshold:
                     # suggest caching
-                    severity = 'GREEN'
-
-                    if name == 'PlayerPedId':
-                        suggestion = 'local ped = PlayerPedId()'
-                    elif name == 'PlayerId':
-                        suggestion = 'local playerId = PlayerId()'
-                    elif name == 'GetPlayerServerId':
-                        suggestion = 'local serverId = GetPlayerServerId(PlayerId())'
-                    elif name == 'GetEntityCoords':
-                        suggestion = 'local coords = GetEntityCoords(ped)'
-                    elif name == 'GetEntityModel':
-                        suggestion = 'local model = GetEntityModel(entity)'
-                    elif name == 'GetHashKey':
-                        suggestion = 'local hash = GetHashKey(str) -- or use `hash` literal'
-                    elif name == 'GetPlayerPed':
-                        suggestion = 'local ped = GetPlayerPed(playerId)'
-                    elif name == 'GetVehiclePedIsIn':
-                        suggestion = 'local vehicle = GetVehiclePedIsIn(ped, false)'
-                    elif name == 'GetEntityHeading':
-                        suggestion = 'local heading = GetEntityHeading(entity)'
-                    elif name == 'GetDistanceBetweenCoords':
-                        suggestion = 'Use #(coords1 - coords2) for faster distance calculation'
-                        severity = 'YELLOW'  # More impactful optimization suggestion
-                    else:
-                        suggestion = f'Cache {name} result'
-
+                    pattern_name, suggestion, severity = REPEATED_CALL_FINDINGS[name]
                     self.findings.append(Finding(
-                        pattern_name=f'repeated_{name.replace(".", "_").replace(":", "_")}',
+                        pattern_name=pattern_name,
                         severity=severity,
                         line_num=calls[0].line,
                         message=f'{name} called {len(calls)}x in {func_scope.name}',
@@ -1640,15 +1908,26 @@ class ASTAnalyzer:
 
     def _analyze_string_concat_in_loop(self):
         """Find string concatenation patterns in loops."""
-        # find self-concatenation: s = s .. x
-        loop_concats: Dict[Tuple[Scope, str], List[ConcatInfo]] = defaultdict(list)
-
+        # group self-concatenation (s = s .. x), the only kind _record_assignment keeps
+        loop_concats: Dict[Tuple[Scope, str], List[ConcatInfo]] = {}
         for concat in self.concats:
-            if concat.in_loop and concat.target and concat.left_var:
-                if concat.target == concat.left_var:
-                    # self concat: s = s .. x
-                    key = (concat.scope, concat.target)
-                    loop_concats[key].append(concat)
+            key = (concat.scope, concat.target)
+            loop_concats.setdefault(key, []).append(concat)
+
+        if not loop_concats:
+            return
+
+        # local, out-of-loop var = "" / var = '' assignments of the concatenated
+        # names, in recording order. one pass over self.assigns for all loops
+        wanted = {var for _, var in loop_concats}
+        empty_inits: Dict[str, List[AssignInfo]] = {}
+        for assign in self.assigns:
+            if (assign.target in wanted and
+                assign.value_type == 'literal' and
+                assign.is_local and
+                not assign.in_loop and
+                self._assign_value_repr(assign) in ('""', "''")):
+                empty_inits.setdefault(assign.target, []).append(assign)
 
         for (scope, var), concats in loop_concats.items():
             if len(concats) >= 1:
@@ -1664,14 +1943,9 @@ class ASTAnalyzer:
                 if loop_scope and concat_info.loop_depth == 1:
                     # look for var = "" or var = '' IMMEDIATELY before the loop
                     # must be: within 3 lines, NOT inside any loop, and must be local declaration
-                    for assign in self.assigns:
-                        if (assign.target == var and 
-                            assign.value_type == 'literal' and
-                            assign.value_repr in ('""', "''") and
-                            assign.line < loop_scope.start_line and
-                            assign.line >= loop_scope.start_line - 3 and  # must be within 3 lines
-                            not assign.in_loop and  # init must NOT be inside any loop
-                            assign.is_local):  # must be a local declaration
+                    for assign in empty_inits.get(var, ()):
+                        if (assign.line < loop_scope.start_line and
+                            assign.line >= loop_scope.start_line - 3):  # must be within 3 lines
                             init_line = assign.line
                             is_safe = True
                             break
@@ -1686,7 +1960,7 @@ class ASTAnalyzer:
                         'count': len(concats),
                         'loop_depth': concat_info.loop_depth,
                         'suggestion': 'Use table.insert() + table.concat()',
-                        'right_expr': concat_info.right_expr,
+                        'right_expr': self._concat_right_expr(concat_info),
                         'loop_start': loop_scope.start_line if loop_scope else None,
                         'loop_end': loop_scope.end_line if loop_scope else None,
                         'init_line': init_line,
@@ -1698,31 +1972,25 @@ class ASTAnalyzer:
 
     def _analyze_debug_statements(self):
         """Find debug/logging statements."""
-        for call in self.calls:
+        # debug calls (minus math.*) were picked out by _record_call
+        for call in self._call_passes['debug']:
             func_name = call.func
-            # exclude math.log - it's mathematical logarithm, not logging
-            if call.full_name and call.full_name.startswith('math.'):
-                continue
-            if func_name in DEBUG_FUNCTIONS:
-                self.findings.append(Finding(
-                    pattern_name='debug_statement',
-                    severity='DEBUG',
-                    line_num=call.line,
-                    message=f'Debug call: {func_name}()',
-                    details={
-                        'function': func_name,
-                        'node': call.node,
-                    },
-                    source_line=self._get_source_line(call.line),
-                ))
+            self.findings.append(Finding(
+                pattern_name='debug_statement',
+                severity='DEBUG',
+                line_num=call.line,
+                message=f'Debug call: {func_name}()',
+                details={
+                    'function': func_name,
+                    'node': call.node,
+                },
+                source_line=self._get_source_line(call.line),
+            ))
 
     def _analyze_global_writes(self):
         """Track global variable writes."""
+        # intentional patterns (_private, CONSTANTS) were filtered out in _visit_Assign
         for name, line in self.global_writes:
-            # skip common patterns that are intentional
-            if name.startswith('_') or name.isupper():
-                continue
-
             self.findings.append(Finding(
                 pattern_name='global_write',
                 severity='RED',
@@ -1740,19 +2008,14 @@ class ASTAnalyzer:
             nil_source = access.nil_source
             reason = NIL_RETURNING_FUNCTIONS.get(nil_source.source_func, 'may return nil')
             
-            # determine severity based on whether it's safe to fix
-            if access.is_safe_to_fix:
-                severity = 'YELLOW'  # can be auto-fixed with --fix-nil
-                message = (f"Potential nil access: '{access.var_name}' from {nil_source.source_func}() "
-                          f"used without nil check (auto-fixable)")
-            else:
-                severity = 'YELLOW'  # warning only, needs manual review
-                message = (f"Potential nil access: '{access.var_name}' from {nil_source.source_func}() "
-                          f"used without nil check")
+            # always a warning, safe ones can additionally be auto-fixed with --fix-nil
+            suffix = ' (auto-fixable)' if access.is_safe_to_fix else ''
+            message = (f"Potential nil access: '{access.var_name}' from {nil_source.source_func}() "
+                      f"used without nil check{suffix}")
             
             self.findings.append(Finding(
                 pattern_name='potential_nil_access',
-                severity=severity,
+                severity='YELLOW',
                 line_num=access.access_line,
                 message=message,
                 details={
@@ -1774,6 +2037,8 @@ class ASTAnalyzer:
         if not hasattr(self, '_ast_tree') or self._ast_tree is None:
             return
         
+        self._index_ast()
+
         # Phase 1: 100% safe patterns (auto-fixable)
         self._detect_code_after_return()
         self._detect_code_after_break()
@@ -1781,9 +2046,24 @@ class ASTAnalyzer:
         self._detect_while_false_loops()
         
         # Phase 2: Warning patterns (not auto-fixable)
+        self._collect_callbacks()
+        self._collect_symbol_facts()
         self._detect_unused_local_vars()
         self._detect_unused_local_funcs()
 
+    def _index_ast(self):
+        """Walk the tree once and bucket nodes by exact type for the dead code passes."""
+        nodes = _walk_nodes(self._ast_tree)
+        nodes_by_type: Dict[type, List[Node]] = {}
+        for node in nodes:
+            bucket = nodes_by_type.get(type(node))
+            if bucket is None:
+                nodes_by_type[type(node)] = [node]
+            else:
+                bucket.append(node)
+        self._ast_nodes = nodes
+        self._nodes_by_type = nodes_by_type
+
     def _detect_code_after_return(self):
         """Detect unreachable code after unconditional return statements."""
         self._walk_for_dead_after_terminator(Return, 'return')
@@ -1792,9 +2072,20 @@ class ASTAnalyzer:
         """Detect unreachable code after break statements in loops."""
         self._walk_for_dead_after_terminator(Break, 'break')
 
-    def _walk_for_dead_after_terminator(self, terminator_type, terminator_name: str):
+    def _walk_for_dead_after_terminator(self, terminator_type: type, terminator_name: str):
         """Walk AST to find dead code after terminators (return/break)."""
-        
+        # nothing can be dead after a terminator the file never uses
+        if terminator_type not in self._nodes_by_type:
+            return
+
+        # same for every finding of this pass
+        dead_type = f'after_{terminator_name}'
+        pattern_name = f'dead_code_{dead_type}'
+        description = f'Unreachable code after {terminator_name}'
+
+        def as_stmt_list(body: Node) -> List[Node]:
+            return body.body if type(body) is Block else [body]
+
         def check_block(block_body: List[Node], scope_name: str, in_loop: bool = False):
             """Check a block for dead code after terminators."""
             if not block_body:
@@ -1802,10 +2093,11 @@ class ASTAnalyzer:
             
             for i, stmt in enumerate(block_body):
                 # check if this is a terminator
-                is_terminator = isinstance(stmt, terminator_type)
-                
+                stmt_type = type(stmt)
+                is_terminator = stmt_type is terminator_type
+
                 # for break, only count as terminator if we're in a loop
-                if isinstance(stmt, Break) and not in_loop:
+                if stmt_type is Break and not in_loop:
                     continue
                 
                 if is_terminator and i < len(block_body) - 1:
@@ -1815,7 +2107,7 @@ class ASTAnalyzer:
                     
                     # filter out comments and semicolons
                     real_dead = [s for s in dead_stmts 
-                                if not isinstance(s, (Comment, SemiColon))]
+                                if type(s) not in _DEAD_SKIP_TYPES]
                     
                     if real_dead:
                         first_dead = real_dead[0]
@@ -1823,33 +2115,26 @@ class ASTAnalyzer:
                         start_line = self._get_line(first_dead)
                         end_line = self._get_end_line(last_dead) or start_line
                         
-                        # get code preview
-                        preview_lines = []
-                        for ln in range(start_line, min(start_line + 3, end_line + 1)):
-                            if 0 < ln <= len(self.source_lines):
-                                preview_lines.append(self.source_lines[ln - 1].rstrip())
-                        code_preview = '\n'.join(preview_lines)
-                        if end_line > start_line + 2:
-                            code_preview += '\n...'
+                        code_preview = self._code_preview(start_line, end_line)
                         
                         self.dead_code.append(DeadCodeInfo(
-                            dead_type=f'after_{terminator_name}',
+                            dead_type=dead_type,
                             start_line=start_line,
                             end_line=end_line,
                             scope_name=scope_name,
-                            description=f'Unreachable code after {terminator_name}',
+                            description=description,
                             is_safe_to_remove=True,
                             code_preview=code_preview,
                             node=first_dead,
                         ))
                         
                         self.findings.append(Finding(
-                            pattern_name=f'dead_code_after_{terminator_name}',
+                            pattern_name=pattern_name,
                             severity='GREEN',  # safe to auto-fix
                             line_num=start_line,
-                            message=f'Unreachable code after {terminator_name} statement (lines {start_line}-{end_line})',
+                            message=f'{description} statement (lines {start_line}-{end_line})',
                             details={
-                                'dead_type': f'after_{terminator_name}',
+                                'dead_type': dead_type,
                                 'start_line': start_line,
                                 'end_line': end_line,
                                 'scope_name': scope_name,
@@ -1860,47 +2145,42 @@ class ASTAnalyzer:
                         ))
                 
                 # recurse into nested structures
-                if isinstance(stmt, (Function, LocalFunction, Method)):
-                    if hasattr(stmt, 'body') and stmt.body:
-                        body = stmt.body.body if isinstance(stmt.body, Block) else [stmt.body]
-                        func_name = self._get_func_name(stmt)
-                        check_block(body, func_name, False)
-                
-                elif isinstance(stmt, If):
-                    if hasattr(stmt, 'body') and stmt.body:
-                        body = stmt.body.body if isinstance(stmt.body, Block) else [stmt.body]
-                        check_block(body, scope_name, in_loop)
-                    if hasattr(stmt, 'orelse') and stmt.orelse:
-                        if isinstance(stmt.orelse, Block):
-                            check_block(stmt.orelse.body, scope_name, in_loop)
-                        elif isinstance(stmt.orelse, (If, ElseIf)):
-                            check_block([stmt.orelse], scope_name, in_loop)
-                
-                elif isinstance(stmt, ElseIf):
-                    if hasattr(stmt, 'body') and stmt.body:
-                        body = stmt.body.body if isinstance(stmt.body, Block) else [stmt.body]
-                        check_block(body, scope_name, in_loop)
-                    if hasattr(stmt, 'orelse') and stmt.orelse:
-                        if isinstance(stmt.orelse, Block):
-                            check_block(stmt.orelse.body, scope_name, in_loop)
-                        elif isinstance(stmt.orelse, (If, ElseIf)):
-                            check_block([stmt.orelse], scope_name, in_loop)
-                
-                elif isinstance(stmt, (While, Repeat)):
-                    if hasattr(stmt, 'body') and stmt.body:
-                        body = stmt.body.body if isinstance(stmt.body, Block) else [stmt.body]
-                        check_block(body, scope_name, True)  # now in a loop
-                
-                elif isinstance(stmt, (Fornum, Forin)):
-                    if hasattr(stmt, 'body') and stmt.body:
-                        body = stmt.body.body if isinstance(stmt.body, Block) else [stmt.body]
-                        check_block(body, scope_name, True)  # now in a loop
-        
+                kind = _NESTED_BODY_KIND.get(type(stmt))
+                if kind is None:
+                    continue
+                body = stmt.body
+                if kind == 'function':
+                    if body:
+                        check_block(as_stmt_list(body), self._get_func_name(stmt), False)
+                elif kind == 'loop':
+                    if body:
+                        check_block(as_stmt_list(body), scope_name, True)  # now in a loop
+                else:
+                    # if / elseif
+                    if body:
+                        check_block(as_stmt_list(body), scope_name, in_loop)
+                    orelse = stmt.orelse
+                    if orelse:
+                        orelse_type = type(orelse)
+                        if orelse_type is Block:
+                            check_block(orelse.body, scope_name, in_loop)
+                        elif orelse_type is If or orelse_type is ElseIf:
+                            check_block([orelse], scope_name, in_loop)
+
         # start from the root
         if hasattr(self._ast_tree, 'body') and self._ast_tree.body:
             body = self._ast_tree.body.body if isinstance(self._ast_tree.body, Block) else [self._ast_tree.body]
             check_block(body, '<global>', False)
 
+    def _code_preview(self, start_line: int, end_line: int) -> str:
+        """First three lines of a line range, with '...' if it goes on."""
+        stop = min(start_line + 3, end_line + 1, self._nlines + 1)
+        lines = self._lines1[max(start_line, 1):max(stop, 0)]
+        preview = '\n'.join([line.rstrip() for line in lines])
+        if end_line > start_line + 2:
+            preview += '\n...'
+        return preview
+
     def _get_func_name(self, node: Node) -> str:
         """Get function name from function node."""
         if isinstance(node, Function):
@@ -1921,66 +2201,86 @@ class ASTAnalyzer:
         """Detect 'while false do ... end' loops."""
         self._walk_for_false_conditions(While, 'while_false')
 
-    def _walk_for_false_conditions(self, node_type, dead_type: str):
+    def _walk_for_false_conditions(self, node_type: type, dead_type: str):
         """Walk AST to find if/while with literal false conditions."""
-        
-        def is_literal_false(node: Node) -> bool:
-            """Check if node is literal false or nil."""
-            return isinstance(node, (FalseExpr, Nil))
-        
-        # single flat walk - O(n) instead of O(n²)
-        for node in ast.walk(self._ast_tree):
-            if isinstance(node, node_type):
-                if hasattr(node, 'test') and is_literal_false(node.test):
-                    start_line = self._get_line(node)
-                    end_line = self._get_end_line(node) or start_line
-                    
-                    # get code preview
-                    preview_lines = []
-                    for ln in range(start_line, min(start_line + 3, end_line + 1)):
-                        if 0 < ln <= len(self.source_lines):
-                            preview_lines.append(self.source_lines[ln - 1].rstrip())
-                    code_preview = '\n'.join(preview_lines)
-                    if end_line > start_line + 2:
-                        code_preview += '\n...'
-                    
-                    type_name = 'if' if node_type == If else 'while'
-                    
-                    self.dead_code.append(DeadCodeInfo(
-                        dead_type=dead_type,
-                        start_line=start_line,
-                        end_line=end_line,
-                        scope_name='<unknown>',
-                        description=f'{type_name} false block (never executes)',
-                        is_safe_to_remove=True,
-                        code_preview=code_preview,
-                        node=node,
-                    ))
-                    
-                    self.findings.append(Finding(
-                        pattern_name=f'dead_code_{dead_type}',
-                        severity='GREEN',  # safe to auto-fix
-                        line_num=start_line,
-                        message=f'Dead code: {type_name} false (lines {start_line}-{end_line})',
-                        details={
-                            'dead_type': dead_type,
-                            'start_line': start_line,
-                            'end_line': end_line,
-                            'scope_name': '<unknown>',
-                            'is_safe_to_remove': True,
-                        },
-                        source_line=self._get_source_line(start_line),
-                    ))
+        nodes_by_type = self._nodes_by_type
+        if FalseExpr not in nodes_by_type and Nil not in nodes_by_type:
+            return
 
-    def _detect_unused_local_vars(self):
-        """Detect local variables that are assigned but never read (Phase 2 - warning only)."""
-        
+        type_name = 'if' if node_type is If else 'while'
+        pattern_name = f'dead_code_{dead_type}'
+        description = f'{type_name} false block (never executes)'
+
+        # buckets from _index_ast, exact-typed and in walk order
+        for node in nodes_by_type.get(node_type, ()):
+            # literal false or nil
+            if hasattr(node, 'test') and type(node.test) in _FALSE_LITERAL_TYPES:
+                start_line = self._get_line(node)
+                end_line = self._get_end_line(node) or start_line
+                
+                code_preview = self._code_preview(start_line, end_line)
+                
+                self.dead_code.append(DeadCodeInfo(
+                    dead_type=dead_type,
+                    start_line=start_line,
+                    end_line=end_line,
+                    scope_name='<unknown>',
+                    description=description,
+                    is_safe_to_remove=True,
+                    code_preview=code_preview,
+                    node=node,
+                ))
+                
+                self.findings.append(Finding(
+                    pattern_name=pattern_name,
+                    severity='GREEN',  # safe to auto-fix
+                    line_num=start_line,
+                    message=f'Dead code: {type_name} false (lines {start_line}-{end_line})',
+                    details={
+                        'dead_type': dead_type,
+                        'start_line': start_line,
+                        'end_line': end_line,
+                        'scope_name': '<unknown>',
+                        'is_safe_to_remove': True,
+                    },
+                    source_line=self._get_source_line(start_line),
+                ))
+
+    def _collect_callbacks(self):
+        """Record functions passed to AddEventHandler, they count as used."""
+        # the visitor already grouped the calls by name
+        for call in self.calls_by_name.get('AddEventHandler', ()):
+            if len(call.args) >= 2:
+                callback_func = self._node_to_string(call.args[1])
+                if callback_func:
+                    self.callback_registrations.add(callback_func)
+
+    def _collect_symbol_facts(self):
+        """
+        Single pass over the indexed AST nodes for both unused-local detectors.
+
+        Fills self._local_var_defs (with is_read resolved), self._local_func_defs
+        and self._called_funcs.
+        """
         local_vars: Dict[str, LocalVarInfo] = {}
+        local_funcs: Dict[str, LocalVarInfo] = {}
+        called_funcs: Set[str] = set()
         assignment_targets: Set[int] = set()  # ids of Name nodes that are assignment targets
-        
-        # First pass: collect all local variable assignments - O(n)
-        for node in ast.walk(self._ast_tree):
-            if isinstance(node, LocalAssign):
+        names: List[Name] = []
+
+        for node in self._ast_nodes:
+            node_type = type(node)
+            if node_type is Name:
+                names.append(node)
+                # function reference (not call)
+                called_funcs.add(node.id)
+
+            elif node_type is Call:
+                func_name = self._node_to_string(node.func)
+                if func_name:
+                    called_funcs.add(func_name)
+
+            elif node_type is LocalAssign:
                 line = self._get_line(node)
                 for target in node.targets:
                     if isinstance(target, Name):
@@ -1995,8 +2295,8 @@ class ASTAnalyzer:
                                 is_read=False,
                                 is_function=False,
                             )
-            
-            elif isinstance(node, LocalFunction):
+
+            elif node_type is LocalFunction:
                 line = self._get_line(node)
                 if isinstance(node.name, Name):
                     assignment_targets.add(id(node.name))
@@ -2009,9 +2309,16 @@ class ASTAnalyzer:
                             is_read=False,
                             is_function=True,
                         )
-            
+                        local_funcs[func_name] = LocalVarInfo(
+                            name=func_name,
+                            assign_line=line,
+                            scope=self.current_scope,
+                            is_read=False,
+                            is_function=True,
+                        )
+
             # Also track for loop variables as assigned
-            elif isinstance(node, Fornum):
+            elif node_type is Fornum:
                 if isinstance(node.target, Name):
                     assignment_targets.add(id(node.target))
                     var_name = node.target.id
@@ -2024,8 +2331,8 @@ class ASTAnalyzer:
                             is_function=False,
                             is_loop_var=True,
                         )
-            
-            elif isinstance(node, Forin):
+
+            elif node_type is Forin:
                 if hasattr(node, 'targets'):
                     for target in node.targets:
                         if isinstance(target, Name):
@@ -2040,24 +2347,23 @@ class ASTAnalyzer:
                                     is_function=False,
                                     is_loop_var=True,
                                 )
-        
-        # Second pass: find all reads - O(n)
-        for node in ast.walk(self._ast_tree):
-            if isinstance(node, Name):
-                # only count as read if NOT an assignment target
-                if id(node) not in assignment_targets:
-                    var_name = node.id
-                    if var_name in local_vars:
-                        local_vars[var_name].is_read = True
-            
-            # Check AddEventHandler for callback registration
-            elif isinstance(node, Call):
-                func_name = self._node_to_string(node.func)
-                if func_name == 'AddEventHandler' and len(node.args) >= 2:
-                    callback_func = self._node_to_string(node.args[1])
-                    if callback_func:
-                        self.callback_registrations.add(callback_func)
-        
+
+        # reads: every Name that isn't an assignment target. resolved after the
+        # walk so a read only marks the last definition of a name, as before
+        for node in names:
+            if id(node) not in assignment_targets:
+                info = local_vars.get(node.id)
+                if info is not None:
+                    info.is_read = True
+
+        self._local_var_defs = local_vars
+        self._local_func_defs = local_funcs
+        self._called_funcs = called_funcs
+
+    def _detect_unused_local_vars(self):
+        """Detect local variables that are assigned but never read (Phase 2 - warning only)."""
+        local_vars = self._local_var_defs
+
         # report unused locals
         for name, info in local_vars.items():
             if not info.is_read and not info.is_function and not info.is_loop_var:
@@ -2080,41 +2386,9 @@ class ASTAnalyzer:
 
     def _detect_unused_local_funcs(self):
         """Detect local functions that are never called (Phase 2 - warning only)."""
-        # Track local function definitions and calls
-        local_funcs: Dict[str, LocalVarInfo] = {}
-        called_funcs: Set[str] = set()
-        
-        # Single pass through AST - O(n)
-        for node in ast.walk(self._ast_tree):
-            if isinstance(node, LocalFunction):
-                line = self._get_line(node)
-                if isinstance(node.name, Name):
-                    func_name = node.name.id
-                    if not func_name.startswith('_'):
-                        local_funcs[func_name] = LocalVarInfo(
-                            name=func_name,
-                            assign_line=line,
-                            scope=self.current_scope,
-                            is_read=False,
-                            is_function=True,
-                        )
-            
-            elif isinstance(node, Call):
-                func_name = self._node_to_string(node.func)
-                if func_name:
-                    called_funcs.add(func_name)
-                
-                # check for AddEventHandler
-                if func_name == 'AddEventHandler' and len(node.args) >= 2:
-                    callback_func = self._node_to_string(node.args[1])
-                    if callback_func:
-                        self.callback_registrations.add(callback_func)
-                        called_funcs.add(callback_func)
-            
-            elif isinstance(node, Name):
-                # function reference (not call)
-                called_funcs.add(node.id)
-        
+        local_funcs = self._local_func_defs
+        called_funcs = self._called_funcs
+
         # report unused local functions
         for name, info in local_funcs.items():
             if name not in called_funcs and name not in self.callback_registrations:
@@ -2141,23 +2415,22 @@ class ASTAnalyzer:
         FiveM optimization: #(vec1 - vec2) is significantly faster than
         GetDistanceBetweenCoords(x1, y1, z1, x2, y2, z2, ...)
         """
-        for call in self.calls:
-            if call.full_name == 'GetDistanceBetweenCoords':
-                # This native is expensive and should be replaced with vector math
-                self.findings.append(Finding(
-                    pattern_name='distance_native',
-                    severity='YELLOW',
-                    line_num=call.line,
-                    message='GetDistanceBetweenCoords() -> #(coords1 - coords2)',
-                    details={
-                        'suggestion': 'Use #(coords1 - coords2) for ~40% faster distance calculation',
-                        'example': 'local dist = #(GetEntityCoords(ped1) - GetEntityCoords(ped2))',
-                        'full_match': self._node_to_string(call.node),
-                        'node': call.node,
-                        'in_loop': call.in_loop,
-                    },
-                    source_line=self._get_source_line(call.line),
-                ))
+        for call in self.calls_by_name.get('GetDistanceBetweenCoords', ()):
+            # This native is expensive and should be replaced with vector math
+            self.findings.append(Finding(
+                pattern_name='distance_native',
+                severity='YELLOW',
+                line_num=call.line,
+                message='GetDistanceBetweenCoords() -> #(coords1 - coords2)',
+                details={
+                    'suggestion': 'Use #(coords1 - coords2) for ~40% faster distance calculation',
+                    'example': 'local dist = #(GetEntityCoords(ped1) - GetEntityCoords(ped2))',
+                    'full_match': self._node_to_string(call.node),
+                    'node': call.node,
+                    'in_loop': call.in_loop,
+                },
+                source_line=self._get_source_line(call.line),
+            ))
 
     def _analyze_oxlib_cache(self):
         """Find native calls that could use ox_lib's cache system.
@@ -2167,14 +2440,12 @@ class ASTAnalyzer:
         Using these is more efficient than calling natives repeatedly.
         """
         # Track which replacements we've already suggested per scope to avoid duplicates
-        suggested_in_scope: Dict[Tuple[int, str], bool] = {}
+        suggested_in_scope: Dict[Optional[Scope], Set[str]] = {}
 
-        for call in self.calls:
-            if call.full_name not in OXLIB_CACHE_REPLACEMENTS:
-                continue
+        for call in self._call_passes['oxlib']:
+            replacement = OXLIB_CACHE_REPLACEMENTS[call.full_name]
 
-            cache_prop, description, args_pattern = OXLIB_CACHE_REPLACEMENTS[call.full_name]
-            scope_id = id(call.scope) if call.scope else 0
+            cache_prop, description, args_pattern = replacement
 
             # Check if arguments match the expected pattern for cache replacement
             is_valid_replacement = False
@@ -2186,33 +2457,29 @@ class ASTAnalyzer:
             elif args_pattern == 'ped':
                 # Expects player ped as argument (GetEntityCoords(PlayerPedId()), etc.)
                 if len(call.args) >= 1:
-                    arg_str = self._node_to_string(call.args[0])
-                    if arg_str in ('PlayerPedId()', 'cache.ped', 'ped'):
+                    if self._is_oxlib_arg(call.args[0], _OXLIB_PED_ARGS):
                         is_valid_replacement = True
                         replacement_note = ' (when arg is player ped)'
             elif args_pattern == 'ped_false':
                 # GetVehiclePedIsIn(ped, false)
                 if len(call.args) >= 2:
-                    arg0_str = self._node_to_string(call.args[0])
-                    arg1_str = self._node_to_string(call.args[1])
-                    if arg0_str in ('PlayerPedId()', 'cache.ped', 'ped') and arg1_str == 'false':
+                    if type(call.args[1]) is FalseExpr and self._is_oxlib_arg(call.args[0], _OXLIB_PED_ARGS):
                         is_valid_replacement = True
                         replacement_note = ' (when checking current vehicle)'
             elif args_pattern == 'player':
                 # GetPlayerServerId(PlayerId())
                 if len(call.args) >= 1:
-                    arg_str = self._node_to_string(call.args[0])
-                    if arg_str in ('PlayerId()', 'cache.playerId'):
+                    if self._is_oxlib_arg(call.args[0], _OXLIB_PLAYER_ARGS):
                         is_valid_replacement = True
 
             if not is_valid_replacement:
                 continue
 
             # Only suggest once per scope per replacement type
-            key = (scope_id, call.full_name)
-            if key in suggested_in_scope:
+            suggested = suggested_in_scope.setdefault(call.scope, set())
+            if call.full_name in suggested:
                 continue
-            suggested_in_scope[key] = True
+            suggested.add(call.full_name)
 
             self.findings.append(Finding(
                 pattern_name='oxlib_cache_suggestion',
@@ -2231,6 +2498,10 @@ class ASTAnalyzer:
                 source_line=self._get_source_line(call.line),
             ))
 
+    def _is_oxlib_arg(self, node: Node, spellings: frozenset) -> bool:
+        """Check an argument against accepted spellings, formatting it only if it can match."""
+        return type(node) in _OXLIB_ARG_TYPES and self._node_to_string(node) in spellings
+
     def _analyze_function_in_loop(self):
         """Find function definitions inside loops.
 
@@ -2258,17 +2529,9 @@ class ASTAnalyzer:
         Using #table multiple times in a loop when the table length doesn't
         change is wasteful. Cache the length before the loop.
         """
-        # Group by (scope, table_name) to find repeated uses
-        from collections import defaultdict
-        scope_table_ops: Dict[Tuple[int, str], List[int]] = defaultdict(list)
-
-        for line, table_name, scope in self.length_ops_in_loops:
-            # Use scope id and table name as key
-            scope_id = id(scope) if scope else 0
-            scope_table_ops[(scope_id, table_name)].append(line)
-
         # Report tables with multiple length operations in the same loop scope
-        for (scope_id, table_name), lines in scope_table_ops.items():
+        # (already grouped by (scope, table_name) while visiting)
+        for (scope, table_name), lines in self.length_ops_in_loops.items():
             if len(lines) >= 2:
                 self.findings.append(Finding(
                     pattern_name='repeated_length_in_loop',
@@ -2314,13 +2577,122 @@ class ASTAnalyzer:
                     ))
 
     def _get_source_line(self, line_num: int) -> str:
-        """Get source line by number."""
-        if 0 < line_num <= len(self.source_lines):
-            return self.source_lines[line_num - 1].rstrip()
+        """Get source line by number (cached)."""
+        if 0 < line_num <= self._nlines:
+            line = self._rstripped_lines[line_num]
+            if line is None:
+                line = self._rstripped_lines[line_num] = self._lines1[line_num].rstrip()
+            return line
         return ""
 
 
-def analyze_file(file_path: Path, cache_threshold: int = 4, experimental: bool = False) -> List[Finding]:
+# node type -> visitor, built once so _visit doesn't have to format and look up
+# a method name for every node it sees
+ASTAnalyzer._HANDLERS = {
+    Chunk: ASTAnalyzer._visit_Chunk,
+    Block: ASTAnalyzer._visit_Block,
+    Function: ASTAnalyzer._visit_Function,
+    LocalFunction: ASTAnalyzer._visit_LocalFunction,
+    Method: ASTAnalyzer._visit_Method,
+    Forin: ASTAnalyzer._visit_Forin,
+    Fornum: ASTAnalyzer._visit_Fornum,
+    While: ASTAnalyzer._visit_While,
+    Repeat: ASTAnalyzer._visit_Repeat,
+    If: ASTAnalyzer._visit_If,
+    ElseIf: ASTAnalyzer._visit_ElseIf,
+    LocalAssign: ASTAnalyzer._visit_LocalAssign,
+    Assign: ASTAnalyzer._visit_Assign,
+    Call: ASTAnalyzer._visit_Call,
+    Invoke: ASTAnalyzer._visit_Invoke,
+    Index: ASTAnalyzer._visit_Index,
+    Table: ASTAnalyzer._visit_Table,
+    Field: ASTAnalyzer._visit_Field,
+    Return: ASTAnalyzer._visit_Return,
+    ULengthOP: ASTAnalyzer._visit_ULengthOP,
+}
+# every other operator only needs its operands visited (# is above). concats
+# are recorded by _record_assignment, s = s .. x needs the assignment target
+ASTAnalyzer._HANDLERS.update(dict.fromkeys((
+    Concat,
+    AddOp, SubOp, MultOp, FloatDivOp, FloorDivOp, ModOp, ExpoOp,
+    AndLoOp, OrLoOp,
+    LessThanOp, GreaterThanOp, LessOrEqThanOp, GreaterOrEqThanOp, EqToOp, NotEqToOp,
+    BAndOp, BOrOp, BXorOp, BShiftLOp, BShiftROp,
+), ASTAnalyzer._visit_binop))
+ASTAnalyzer._HANDLERS.update(dict.fromkeys((UMinusOp, UBNotOp, ULNotOp), ASTAnalyzer._visit_unop))
+ASTAnalyzer._HANDLERS.update(dict.fromkeys(_TERMINAL_TYPES))
+_VISIT_CHILDREN = ASTAnalyzer._visit_children
+
+
+def _binop_to_string(fmt: str):
+    return lambda self, node: fmt.format(self._node_to_string(node.left), self._node_to_string(node.right))
+
+
+def _unop_to_string(prefix: str):
+    return lambda self, node: prefix + self._node_to_string(node.operand)
+
+
+# node type -> stringifier used by ASTAnalyzer._node_to_string
+_NODE_STR: Dict[type, Callable[[ASTAnalyzer, Node], str]] = {
+    Name: lambda self, node: node.id,
+    Number: lambda self, node: str(node.n),
+    String: ASTAnalyzer._string_to_string,
+    TrueExpr: lambda self, node: "true",
+    FalseExpr: lambda self, node: "false",
+    Nil: lambda self, node: "nil",
+    Index: ASTAnalyzer._index_to_string,
+    Call: ASTAnalyzer._call_to_string,
+    Invoke: ASTAnalyzer._invoke_to_string,
+    ULengthOP: _unop_to_string("#"),
+    UMinusOp: _unop_to_string("-"),
+    ULNotOp: _unop_to_string("not "),
+    UBNotOp: _unop_to_string("~"),
+    Concat: _binop_to_string("{} .. {}"),
+    OrLoOp: _binop_to_string("({} or {})"),
+    AndLoOp: _binop_to_string("({} and {})"),
+    AddOp: _binop_to_string("{} + {}"),
+    SubOp: _binop_to_string("{} - {}"),
+    MultOp: _binop_to_string("{} * {}"),
+    FloatDivOp: _binop_to_string("{} / {}"),
+    ModOp: _binop_to_string("{} % {}"),
+    ExpoOp: _binop_to_string("{} ^ {}"),
+    EqToOp: _binop_to_string("{} == {}"),
+    NotEqToOp: _binop_to_string("{} ~= {}"),
+    LessThanOp: _binop_to_string("{} < {}"),
+    GreaterThanOp: _binop_to_string("{} > {}"),
+    LessOrEqThanOp: _binop_to_string("{} <= {}"),
+    GreaterOrEqThanOp: _binop_to_string("{} >= {}"),
+    Table: lambda self, node: "{...}",
+}
+
+
+def analyze_file(file_path: Path, cache_threshold: int = 4, experimental: bool = False,
+                 cache_dir: Optional[Path] = None) -> List[Finding]:
     """Convenience function to analyze a file."""
-    analyzer = ASTAnalyzer(cache_threshold=cache_threshold, experimental=experimental)
+    analyzer = ASTAnalyzer(cache_threshold=cache_threshold, experimental=experimental, cache_dir=cache_dir)
     return analyzer.analyze_file(file_path)
+
+
+def analyze_files(file_paths: Iterable[Path], cache_threshold: int = 4, experimental: bool = False,
+                  cache_dir: Optional[Path] = None,
+                  workers: Optional[int] = None) -> Iterator[Tuple[Path, List[Finding]]]:
+    """
+    Analyze several files, yielding (path, findings) in input order.
+
+    Files are independent, so they are spread over worker processes (the
+    parse and walk are pure Python and CPU bound). workers=1 analyzes them
+    in this process.
+    """
+    paths = list(file_paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        analyzer = ASTAnalyzer(cache_threshold=cache_threshold, experimental=experimental, cache_dir=cache_dir)
+        for path in paths:
+            yield path, analyzer.analyze_file(path)
+        return
+
+    worker = partial(analyze_file, cache_threshold=cache_threshold, experimental=experimental,
+                     cache_dir=cache_dir)
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(paths, executor.map(worker, paths, chunksize=chunksize))
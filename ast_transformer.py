@@ -7,16 +7,18 @@ Refactored for FiveM/GTA 5 Lua optimization.
 """
 
 import re
+from array import array
+from bisect import bisect_right
 from pathlib import Path
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple, Set
 import shutil
 
 from ast_analyzer import analyze_file, ASTAnalyzer, Scope
-from models import Finding
+from models import Finding, _DATACLASS_SLOTS
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class SourceEdit:
     """A source code edit with character positions."""
     start_char: int      # start character offset in source
@@ -30,6 +32,8 @@ class ASTTransformer:
 
     def __init__(self):
         self.source: str = ""
+        self._line_starts: Optional[array] = None  # built on demand, see _get_line_starts
+        self._span_cache: Dict[int, Tuple[Optional[int], Optional[int]]] = {}  # id(node) -> span
         self.edits: List[SourceEdit] = []
         self.file_path: Optional[Path] = None
         self.analyzer: Optional[ASTAnalyzer] = None
@@ -58,6 +62,8 @@ class ASTTransformer:
 
         # get source from analyzer
         self.source = self.analyzer.source
+        self._line_starts = None
+        self._span_cache = {}
 
         # filter to fixable severities
         allowed_severities = {'GREEN'}
@@ -322,8 +328,8 @@ class ASTTransformer:
             start_char, end_char = self._get_node_span(node)
             if start_char is not None:
                 # find all lines this call spans
-                start_line = self.source[:start_char].count('\n') + 1
-                end_line = self.source[:end_char].count('\n') + 1
+                start_line = self._get_line_at(start_char)
+                end_line = self._get_line_at(end_char)
 
                 # expression continuations - if prev line ends with these, call is part of expr
                 expr_continuations = [' and', ' or', '(', ',', '=', '{', '[']
@@ -731,8 +737,8 @@ class ASTTransformer:
 
         for name in sorted(globals_info.keys()):
             if '.' in name:
-                module, func = name.split('.', 1)
-                cache_name = f'{module}_{func}'
+                # module.func -> module_func
+                cache_name = name.replace('.', '_', 1)
             else:
                 cache_name = f'g_{name}'
 
@@ -773,13 +779,9 @@ class ASTTransformer:
                 if not node:
                     continue
 
-                # for calls like pairs(), ipairs() - replace the function name part
-                if '.' not in name:
-                    # bare global - find and replace just the name
-                    start, end = self._get_call_func_span(node, name)
-                else:
-                    # module.func - replace the whole func reference
-                    start, end = self._get_call_func_span(node, name)
+                # bare globals (pairs(), ipairs()) replace just the name,
+                # module.func the whole func reference
+                start, end = self._get_call_func_span(node, name)
 
                 if start is None:
                     continue
@@ -1211,7 +1213,15 @@ class ASTTransformer:
     # Position helpers using AST tokens
 
     def _get_node_span(self, node) -> Tuple[Optional[int], Optional[int]]:
-        """Get character span (start, end) for an AST node."""
+        """Get character span (start, end) for an AST node (cached per node)."""
+        key = id(node)
+        span = self._span_cache.get(key)
+        if span is None:
+            span = self._span_cache[key] = self._compute_node_span(node)
+        return span
+
+    def _compute_node_span(self, node) -> Tuple[Optional[int], Optional[int]]:
+        """Work out the character span of a node from its tokens."""
         from luaparser.astnodes import Call, Index, Invoke, Name
 
         # for Call nodes with Index func (like table.insert),
@@ -1284,11 +1294,15 @@ class ASTTransformer:
         first = getattr(node, 'first_token', None)
         last = getattr(node, 'last_token', None)
 
-        if not first or not last or str(first) == 'None' or str(last) == 'None':
+        if not first or not last:
+            return None, None
+        first_str = str(first)
+        last_str = str(last)
+        if first_str == 'None' or last_str == 'None':
             return None, None
 
-        start = self._parse_token_start(str(first))
-        end = self._parse_token_end(str(last))
+        start = self._parse_token_start(first_str)
+        end = self._parse_token_end(last_str)
 
         return start, end
 
@@ -1391,18 +1405,35 @@ class ASTTransformer:
             return int(match.group(1)) + 1
         return None
 
+    def _get_line_starts(self) -> array:
+        """Character offset of the start of every line, computed once per source."""
+        if self._line_starts is None:
+            starts = array('i', [0])
+            source = self.source
+            pos = source.find('\n')
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = source.find('\n', pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def _get_line_at(self, char_pos: int) -> int:
+        """1-based line number of a character offset."""
+        return bisect_right(self._get_line_starts(), char_pos)
+
     def _get_line_span(self, line_num: int) -> Tuple[Optional[int], Optional[int]]:
         """Get character span for a line (1-indexed), including newline."""
-        lines = self.source.split('\n')
-        if line_num < 1 or line_num > len(lines):
+        starts = self._get_line_starts()
+        if line_num < 1 or line_num > len(starts):
             return None, None
 
-        start = sum(len(l) + 1 for l in lines[:line_num - 1])
-        end = start + len(lines[line_num - 1])
+        start = starts[line_num - 1]
 
         # include newline if not last line
-        if line_num < len(lines):
-            end += 1
+        if line_num < len(starts):
+            end = starts[line_num]
+        else:
+            end = len(self.source)
 
         return start, end
 
@@ -1413,19 +1444,19 @@ class ASTTransformer:
 
     def _get_line_end(self, line_num: int) -> Optional[int]:
         """Get character position of line end (before newline)."""
-        lines = self.source.split('\n')
-        if line_num < 1 or line_num > len(lines):
+        starts = self._get_line_starts()
+        if line_num < 1 or line_num > len(starts):
             return None
 
-        pos = sum(len(l) + 1 for l in lines[:line_num - 1])
-        pos += len(lines[line_num - 1])
-        return pos
+        if line_num < len(starts):
+            return starts[line_num] - 1
+        return len(self.source)
 
     def _get_indent_at_line(self, line_num: int) -> str:
         """Get indentation at a line."""
-        lines = self.source.split('\n')
-        if 0 < line_num <= len(lines):
-            line = lines[line_num - 1]
+        start = self._get_line_start(line_num)
+        if start is not None:
+            line = self.source[start:self._get_line_end(line_num)]
             stripped = line.lstrip()
             return line[:len(line) - len(stripped)]
         return ''
@@ -20,6 +20,9 @@ Options:
     --cache-threshold N
                        Minimum function call count to trigger caching (default: 4)
                        Hot callbacks use N-1. Lower = more aggressive caching.
+    --cache-dir [path]
+                       Keep analysis results on disk and skip unchanged files on
+                       the next run (default: ~/.cache/flao)
 
     # IMPORTANT
     --backup-all-scripts [path]
@@ -88,11 +91,20 @@ def analyze_file_with_timeout(file_path: Path, timeout: float):
             raise TimeoutError(f"Analysis timed out for {file_path.name}")
 
 
+def _file_size(path: Path) -> int:
+    """Size of a file in bytes, 0 if it can't be read."""
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
 def analyze_file_worker(args_tuple):
     """Worker function for parallel analyze_file calls."""
-    resource_name, script_path, timeout, cache_threshold, experimental = args_tuple
+    resource_name, script_path, timeout, cache_threshold, experimental, cache_dir = args_tuple
     try:
-        findings = analyze_file(script_path, cache_threshold=cache_threshold, experimental=experimental)
+        findings = analyze_file(script_path, cache_threshold=cache_threshold, experimental=experimental,
+                                cache_dir=cache_dir)
         return (resource_name, script_path, findings, None)
     except Exception as e:
         return (resource_name, script_path, [], str(e))
@@ -230,6 +242,15 @@ def main():
         metavar="N",
         help="Minimum function call count to trigger caching (default: 4, hot loops use N-1)"
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        nargs='?',
+        const=str(Path.home() / '.cache' / 'flao'),
+        default=None,
+        metavar="PATH",
+        help="Reuse analysis results for unchanged files from this directory (default: ~/.cache/flao)"
+    )
     parser.add_argument(
         "--backup",
         action="store_true",
@@ -640,71 +661,85 @@ def main():
     start_time = datetime.now()
 
     if not args.quiet:
-        print(f"Analyzing with {num_workers} workers...")
+        if args.single_thread:
+            print("Analyzing in single-thread mode...")
+        else:
+            print(f"Analyzing with {num_workers} workers...")
 
     # prepare work items for parallel analysis
     work_items = [
-        (resource_name, script_path, args.timeout, args.cache_threshold, args.experimental)
+        (resource_name, script_path, args.timeout, args.cache_threshold, args.experimental, args.cache_dir)
         for resource_name, script_path in all_files
     ]
 
     completed = 0
     pool_crashed = False
+    processed_paths = set()
+    # results arrive out of order, hand them to the reporter in discovery order
+    pool_findings = {}
 
-    try:
-        with ProcessPoolExecutor(max_workers=num_workers) as executor:
-            futures = {executor.submit(analyze_file_worker, item): item for item in work_items}
-
-            for future in as_completed(futures):
-                completed += 1
+    # --single-thread skips the pool and goes straight to the sequential loop below
+    if not args.single_thread:
+        try:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                # biggest scripts first, so one large file picked up last doesn't
+                # leave the other workers idle at the end of the run
+                by_size = sorted(work_items, key=lambda item: _file_size(item[1]), reverse=True)
+                futures = {executor.submit(analyze_file_worker, item): item for item in by_size}
 
-                try:
-                    resource_name, script_path, findings, error = future.result()
-                except BrokenExecutor:
-                    pool_crashed = True
-                    break
-                except Exception as e:
-                    files_skipped += 1
-                    if args.verbose:
-                        item = futures[future]
-                        print(f"\n  [ERROR] {item[1].name}: {e}")
-                    continue
+                for future in as_completed(futures):
+                    completed += 1
 
-                if not args.quiet:
-                    progress = completed / len(all_files) * 100
-                    elapsed = (datetime.now() - start_time).total_seconds()
-                    rate = completed / elapsed if elapsed > 0 else 0
-                    eta = (len(all_files) - completed) / rate if rate > 0 else 0
-                    print(
-                        f"\r[{progress:5.1f}%] {completed}/{len(all_files)} | ETA: {eta:.0f}s  ", end="", flush=True)
-
-                if error:
-                    if 'SyntaxError' in error or 'parse' in error.lower():
-                        parse_errors += 1
-                        if args.verbose:
-                            print(f"\n  [PARSE ERROR] {script_path.name}")
-                    else:
+                    try:
+                        resource_name, script_path, findings, error = future.result()
+                        processed_paths.add(script_path)
+                    except BrokenExecutor:
+                        pool_crashed = True
+                        break
+                    except Exception as e:
                         files_skipped += 1
                         if args.verbose:
-                            print(f"\n  [ERROR] {script_path.name}: {error}")
-                else:
-                    files_analyzed += 1
-                    if findings:
-                        files_with_issues += 1
-                        for finding in findings:
-                            reporter.add_finding(resource_name, script_path, finding)
-
-                        if args.verbose and not args.quiet:
-                            print(f"\n  [{len(findings):3d} issues] {script_path.name}")
-    except BrokenExecutor:
-        pool_crashed = True
-
-    if pool_crashed:
-        if not args.quiet:
+                            item = futures[future]
+                            print(f"\n  [ERROR] {item[1].name}: {e}")
+                        continue
+
+                    if not args.quiet:
+                        progress = completed / len(all_files) * 100
+                        elapsed = (datetime.now() - start_time).total_seconds()
+                        rate = completed / elapsed if elapsed > 0 else 0
+                        eta = (len(all_files) - completed) / rate if rate > 0 else 0
+                        print(
+                            f"\r[{progress:5.1f}%] {completed}/{len(all_files)} | ETA: {eta:.0f}s  ", end="", flush=True)
+
+                    if error:
+                        if 'SyntaxError' in error or 'parse' in error.lower():
+                            parse_errors += 1
+                            if args.verbose:
+                                print(f"\n  [PARSE ERROR] {script_path.name}")
+                        else:
+                            files_skipped += 1
+                            if args.verbose:
+                                print(f"\n  [ERROR] {script_path.name}: {error}")
+                    else:
+                        files_analyzed += 1
+                        if findings:
+                            files_with_issues += 1
+                            pool_findings[script_path] = findings
+
+                            if args.verbose and not args.quiet:
+                                print(f"\n  [{len(findings):3d} issues] {script_path.name}")
+        except BrokenExecutor:
+            pool_crashed = True
+
+        for resource_name, script_path in all_files:
+            for finding in pool_findings.get(script_path, ()):
+                reporter.add_finding(resource_name, script_path, finding)
+
+    if pool_crashed or args.single_thread:
+        if pool_crashed and not args.quiet:
             print(f"\n\nWorker crashed. Falling back to single-threaded mode...")
 
-        remaining = [(m, s) for m, s in all_files if (m, s, args.timeout) not in
-                     {futures[f] for f in futures if f.done()}] if 'futures' in dir() else all_files[completed:]
+        remaining = [(m, s) for m, s in all_files if s not in processed_paths]
 
         for resource_name, script_path in remaining:
             completed += 1
@@ -714,7 +749,8 @@ def main():
                     f"\r[{progress:5.1f}%] {completed}/{len(all_files)} | {script_path.name[:30]:<30}", end="", flush=True)
 
             try:
-                findings = analyze_file(script_path, cache_threshold=args.cache_threshold, experimental=args.experimental)
+                findings = analyze_file(script_path, cache_threshold=args.cache_threshold, experimental=args.experimental,
+                                        cache_dir=args.cache_dir)
                 files_analyzed += 1
                 if findings:
                     files_with_issues += 1
@@ -836,10 +872,12 @@ def main():
 
             try:
                 with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    # biggest scripts first, same as the analysis pool
+                    by_size = sorted(work_items, key=lambda item: _file_size(item[0]), reverse=True)
                     futures = {
                         executor.submit(
                             transform_file_worker,
-                            item): item for item in work_items}
+                            item): item for item in by_size}
 
                     for future in as_completed(futures):
                         completed += 1
@@ -2,11 +2,16 @@
 Shared data the Lua analyzer.
 """
 
+import sys
 from dataclasses import dataclass, field
 from typing import Dict, Any, Optional
 
+# shared by every record-heavy dataclass in the tool; slots need 3.10+,
+# older interpreters just get the regular ones
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_DATACLASS_SLOTS)
 class Finding:
     """Represents a single issue found during analysis."""
     pattern_name: str
@@ -10,7 +10,7 @@ Refactored for FiveM/GTA 5 Lua optimization.
 import html
 import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set, Tuple
 from dataclasses import asdict
 from collections import defaultdict
 from datetime import datetime
@@ -130,6 +130,8 @@ class Reporter:
     def __init__(self):
         # script_name -> file_path -> list of findings
         self.findings: Dict[str, Dict[str, List[Finding]]] = defaultdict(lambda: defaultdict(list))
+        # (file_path, pattern_name, line_num, full_match) of findings already added
+        self._seen: Set[Tuple[str, str, int, str]] = set()
         self.start_time = datetime.now()
 
         # setup jinja2 if available
@@ -144,8 +146,21 @@ class Reporter:
                 self._jinja_env.filters['basename'] = lambda p: Path(p).name
 
     def add_finding(self, script_name: str, file_path: Path, finding: Finding):
-        """Add a finding to the report."""
-        self.findings[script_name][str(file_path)].append(finding)
+        """Add a finding to the report.
+
+        Findings that read the same as one already added for the file (same
+        pattern, line and full_match, e.g. two table.insert(t, v) on one line)
+        are listed once. The fixer works from the analyzer's own findings, so
+        every call site is still rewritten.
+        """
+        path = str(file_path)
+        full_match = finding.details.get('full_match')
+        if full_match is not None:
+            key = (path, finding.pattern_name, finding.line_num, full_match)
+            if key in self._seen:
+                return
+            self._seen.add(key)
+        self.findings[script_name][path].append(finding)
 
     @property
     def all_findings(self) -> List[Finding]:
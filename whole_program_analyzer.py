@@ -10,7 +10,7 @@ from pathlib import Path
 from typing import Dict, Set, List, Tuple, Optional, Any
 from collections import defaultdict
 import sys
-import io
+import os
 
 from luaparser import ast
 from luaparser.astnodes import (
@@ -22,8 +22,14 @@ from luaparser.astnodes import (
     Return, Break,
 )
 
+from models import _DATACLASS_SLOTS
 
-@dataclass
+
+# sink for ANTLR lexer errors printed during parsing
+_DEVNULL = open(os.devnull, 'w')
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class SymbolDefinition:
     """Tracks where a symbol is defined."""
     name: str
@@ -35,7 +41,7 @@ class SymbolDefinition:
     is_class_method: bool = False
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class SymbolUsage:
     """Tracks where a symbol is used."""
     name: str
@@ -44,7 +50,7 @@ class SymbolUsage:
     usage_type: str  # 'call', 'read', 'callback_register'
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class CrossFileAnalysis:
     """Results of whole-program analysis."""
     definitions: Dict[str, List[SymbolDefinition]] = field(default_factory=lambda: defaultdict(list))
@@ -113,98 +119,81 @@ class WholeProgramAnalyzer:
         self.analysis = CrossFileAnalysis()
         self.files_analyzed: Set[Path] = set()
         self.parse_errors: List[Tuple[Path, str]] = []
+        # node id -> _node_to_string result, only valid for the tree being visited
+        self._node_str_cache: Dict[int, str] = {}
     
     def analyze_directory(self, directory: Path, recursive: bool = True) -> CrossFileAnalysis:
         """Analyze all .script files in a directory."""
         pattern = '**/*.script' if recursive else '*.script'
         script_files = list(directory.glob(pattern))
-        
-        # Pass 1: Collect all definitions
-        for script_path in script_files:
-            self._collect_definitions(script_path)
-        
-        # Pass 2: Collect all usages
-        for script_path in script_files:
-            self._collect_usages(script_path)
-        
-        return self.analysis
+        return self.analyze_files(script_files)
     
     def analyze_files(self, files: List[Path]) -> CrossFileAnalysis:
         """Analyze a specific list of files."""
-        # Pass 1: Collect all definitions
+        # definitions and usages don't depend on each other, so both are
+        # collected from a single parse of each file (parsing is the slow part)
         for script_path in files:
-            self._collect_definitions(script_path)
-        
-        # Pass 2: Collect all usages
-        for script_path in files:
-            self._collect_usages(script_path)
+            self._collect_symbols(script_path)
         
         return self.analysis
     
-    def _parse_file(self, file_path: Path) -> Optional[Chunk]:
-        """Parse a Lua file, returning None on error."""
+    def _parse_file(self, file_path: Path) -> Optional[Tuple[Chunk, str]]:
+        """Parse a Lua file, returning (tree, source) or None on error."""
         try:
             source = file_path.read_text(encoding='utf-8', errors='ignore')
             old_stderr = sys.stderr
-            sys.stderr = io.StringIO()
+            sys.stderr = _DEVNULL
             try:
                 tree = ast.parse(source)
             finally:
                 sys.stderr = old_stderr
-            return tree
+            return tree, source
         except Exception as e:
             self.parse_errors.append((file_path, str(e)))
             return None
     
-    def _collect_definitions(self, file_path: Path):
-        """Pass 1: Collect all symbol definitions from a file."""
-        tree = self._parse_file(file_path)
-        if not tree:
+    def _collect_symbols(self, file_path: Path):
+        """Collect all symbol definitions and usages from a file."""
+        parsed = self._parse_file(file_path)
+        if not parsed:
             return
+        tree, source = parsed
         
         self.files_analyzed.add(file_path)
+        self._node_str_cache.clear()
         self._visit_for_definitions(tree, file_path)
-    
-    def _collect_usages(self, file_path: Path):
-        """Pass 2: Collect all symbol usages from a file."""
-        tree = self._parse_file(file_path)
-        if not tree:
-            return
-        
-        source = file_path.read_text(encoding='utf-8', errors='ignore')
         self._visit_for_usages(tree, file_path, source)
     
     def _get_line(self, node: Node) -> int:
         """Extract line number from node."""
         ft = getattr(node, 'first_token', None)
-        if ft:
-            s = str(ft)
-            if ',' in s:
-                parts = s.rsplit(',', 1)
-                if len(parts) == 2:
-                    line_col = parts[1].rstrip(']')
-                    if ':' in line_col:
-                        try:
-                            return int(line_col.split(':')[0])
-                        except ValueError:
-                            pass
-        return 0
+        if ft is None:
+            return 0
+        return ft.line or 0
     
     def _node_to_string(self, node: Node) -> str:
         """Convert AST node to string representation."""
-        if isinstance(node, Name):
+        # exact type checks: these luaparser node types are never subclassed
+        node_type = type(node)
+        if node_type is Name:
             return node.id
-        elif isinstance(node, Index):
-            value = self._node_to_string(node.value)
-            idx = self._node_to_string(node.idx)
-            idx_token = getattr(node.idx, 'first_token', None)
-            if idx_token is not None and str(idx_token) != 'None':
-                return f"{value}[{idx}]"
-            else:
-                return f"{value}.{idx}"
-        elif isinstance(node, String):
+        elif node_type is Index:
+            # nested indexes are stringified again for every level the usage
+            # walk descends through, so these are memoized per tree
+            key = id(node)
+            text = self._node_str_cache.get(key)
+            if text is None:
+                value = self._node_to_string(node.value)
+                idx = self._node_to_string(node.idx)
+                if getattr(node.idx, 'first_token', None) is not None:
+                    text = f"{value}[{idx}]"
+                else:
+                    text = f"{value}.{idx}"
+                self._node_str_cache[key] = text
+            return text
+        elif node_type is String:
             s = node.s
-            if isinstance(s, bytes):
+            if type(s) is bytes:
                 s = s.decode('utf-8', errors='replace')
             return s
         return ""
@@ -213,127 +202,129 @@ class WholeProgramAnalyzer:
         """Visit AST to collect definitions."""
         if node is None:
             return
-        
-        # Global function: function name() ... end
-        if isinstance(node, Function):
-            if isinstance(node.name, Name):
-                name = node.name.id
+
+        # one walk over the tree, each node dispatched on its exact type
+        handlers = self._DEFINITION_HANDLERS
+        for child in ast.walk(node):
+            handler = handlers.get(type(child))
+            if handler is not None:
+                handler(self, child, file_path)
+
+    def _define_function(self, node: Function, file_path: Path):
+        """Global function: function name() ... end"""
+        if isinstance(node.name, Name):
+            name = node.name.id
+            line = self._get_line(node)
+            is_callback = name in KNOWN_CALLBACKS
+
+            self.analysis.definitions[name].append(SymbolDefinition(
+                name=name,
+                file_path=file_path,
+                line=line,
+                symbol_type='global_function',
+                scope='global',
+                is_callback=is_callback,
+            ))
+
+            if is_callback:
+                self.analysis.registered_callbacks.add(name)
+
+        # Module function: function module.name() ... end
+        elif isinstance(node.name, Index):
+            full_name = self._node_to_string(node.name)
+            line = self._get_line(node)
+
+            self.analysis.definitions[full_name].append(SymbolDefinition(
+                name=full_name,
+                file_path=file_path,
+                line=line,
+                symbol_type='module_function',
+                scope='module',
+            ))
+            # module functions are potentially exported
+            self.analysis.exported_symbols.add(full_name)
+
+    def _define_local_function(self, node: LocalFunction, file_path: Path):
+        """Local function: local function name() ... end"""
+        if isinstance(node.name, Name):
+            name = node.name.id
+            line = self._get_line(node)
+            is_callback = name in KNOWN_CALLBACKS
+
+            self.analysis.definitions[f"local:{file_path.stem}:{name}"].append(SymbolDefinition(
+                name=name,
+                file_path=file_path,
+                line=line,
+                symbol_type='local_function',
+                scope='local',
+                is_callback=is_callback,
+            ))
+
+    def _define_method(self, node: Method, file_path: Path):
+        """Method definition: function class:method() ... end"""
+        source = self._node_to_string(node.source)
+        method = node.name.id if isinstance(node.name, Name) else ""
+        full_name = f"{source}:{method}"
+        line = self._get_line(node)
+        is_class_method = method in KNOWN_CALLBACKS
+
+        self.analysis.definitions[full_name].append(SymbolDefinition(
+            name=full_name,
+            file_path=file_path,
+            line=line,
+            symbol_type='method',
+            scope='module',
+            is_class_method=is_class_method,
+        ))
+
+        if is_class_method:
+            self.analysis.exported_symbols.add(full_name)
+
+    def _define_assign(self, node: Assign, file_path: Path):
+        """Global assignment: name = value, module.name = value"""
+        for target in node.targets:
+            if isinstance(target, Name):
+                name = target.id
                 line = self._get_line(node)
-                is_callback = name in KNOWN_CALLBACKS
-                
-                self.analysis.definitions[name].append(SymbolDefinition(
-                    name=name,
-                    file_path=file_path,
-                    line=line,
-                    symbol_type='global_function',
-                    scope='global',
-                    is_callback=is_callback,
-                ))
-                
-                if is_callback:
-                    self.analysis.registered_callbacks.add(name)
-            
-            # Module function: function module.name() ... end
-            elif isinstance(node.name, Index):
-                full_name = self._node_to_string(node.name)
+
+                # Check if assigning a function
+                if node.values and len(node.values) == 1:
+                    val = node.values[0]
+                    if isinstance(val, Function):
+                        is_callback = name in KNOWN_CALLBACKS
+                        self.analysis.definitions[name].append(SymbolDefinition(
+                            name=name,
+                            file_path=file_path,
+                            line=line,
+                            symbol_type='global_function',
+                            scope='global',
+                            is_callback=is_callback,
+                        ))
+                        if is_callback:
+                            self.analysis.registered_callbacks.add(name)
+                    else:
+                        self.analysis.definitions[name].append(SymbolDefinition(
+                            name=name,
+                            file_path=file_path,
+                            line=line,
+                            symbol_type='global_var',
+                            scope='global',
+                        ))
+
+            # Module assignment: module.name = value
+            elif isinstance(target, Index):
+                full_name = self._node_to_string(target)
                 line = self._get_line(node)
-                
+
                 self.analysis.definitions[full_name].append(SymbolDefinition(
                     name=full_name,
                     file_path=file_path,
                     line=line,
-                    symbol_type='module_function',
+                    symbol_type='module_var',
                     scope='module',
                 ))
-                # module functions are potentially exported
                 self.analysis.exported_symbols.add(full_name)
-        
-        # Local function: local function name() ... end
-        elif isinstance(node, LocalFunction):
-            if isinstance(node.name, Name):
-                name = node.name.id
-                line = self._get_line(node)
-                is_callback = name in KNOWN_CALLBACKS
-                
-                self.analysis.definitions[f"local:{file_path.stem}:{name}"].append(SymbolDefinition(
-                    name=name,
-                    file_path=file_path,
-                    line=line,
-                    symbol_type='local_function',
-                    scope='local',
-                    is_callback=is_callback,
-                ))
-        
-        # Method definition: function class:method() ... end
-        elif isinstance(node, Method):
-            source = self._node_to_string(node.source)
-            method = node.name.id if isinstance(node.name, Name) else ""
-            full_name = f"{source}:{method}"
-            line = self._get_line(node)
-            is_class_method = method in KNOWN_CALLBACKS
-            
-            self.analysis.definitions[full_name].append(SymbolDefinition(
-                name=full_name,
-                file_path=file_path,
-                line=line,
-                symbol_type='method',
-                scope='module',
-                is_class_method=is_class_method,
-            ))
-            
-            if is_class_method:
-                self.analysis.exported_symbols.add(full_name)
-        
-        # Global assignment: name = value
-        elif isinstance(node, Assign):
-            for target in node.targets:
-                if isinstance(target, Name):
-                    name = target.id
-                    line = self._get_line(node)
-                    
-                    # Check if assigning a function
-                    if node.values and len(node.values) == 1:
-                        val = node.values[0]
-                        if isinstance(val, Function):
-                            is_callback = name in KNOWN_CALLBACKS
-                            self.analysis.definitions[name].append(SymbolDefinition(
-                                name=name,
-                                file_path=file_path,
-                                line=line,
-                                symbol_type='global_function',
-                                scope='global',
-                                is_callback=is_callback,
-                            ))
-                            if is_callback:
-                                self.analysis.registered_callbacks.add(name)
-                        else:
-                            self.analysis.definitions[name].append(SymbolDefinition(
-                                name=name,
-                                file_path=file_path,
-                                line=line,
-                                symbol_type='global_var',
-                                scope='global',
-                            ))
-                
-                # Module assignment: module.name = value
-                elif isinstance(target, Index):
-                    full_name = self._node_to_string(target)
-                    line = self._get_line(node)
-                    
-                    self.analysis.definitions[full_name].append(SymbolDefinition(
-                        name=full_name,
-                        file_path=file_path,
-                        line=line,
-                        symbol_type='module_var',
-                        scope='module',
-                    ))
-                    self.analysis.exported_symbols.add(full_name)
-        
-        # Recurse into children
-        for child in ast.walk(node):
-            if child is not node:
-                self._visit_for_definitions(child, file_path, in_local_scope)
-    
+
     def _visit_for_usages(self, node: Node, file_path: Path, source: str):
         """Visit AST to collect usages."""
         if node is None:
@@ -420,6 +411,17 @@ class WholeProgramAnalyzer:
                 ))
 
 
+# node type -> definition handler used by _visit_for_definitions. LocalAssign is
+# an Assign subclass and goes through the same handler
+WholeProgramAnalyzer._DEFINITION_HANDLERS = {
+    Function: WholeProgramAnalyzer._define_function,
+    LocalFunction: WholeProgramAnalyzer._define_local_function,
+    Method: WholeProgramAnalyzer._define_method,
+    Assign: WholeProgramAnalyzer._define_assign,
+    LocalAssign: WholeProgramAnalyzer._define_assign,
+}
+
+
 def analyze_resources_directory(resources_path: Path) -> CrossFileAnalysis:
     """Convenience function to analyze entire FiveM resources directory."""
     analyzer = WholeProgramAnalyzer()